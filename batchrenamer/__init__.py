@@ -3,4 +3,12 @@ __version__ = "1.5.2"
 __author__ = "Sean Slater"
 
 from .batchrenamer import *
+from .columns import *
 from .filehistory import *
+from .hashing import *
+from .numbering import *
+from .oplog import *
+from .patterns import *
+from .planner import *
+from .saver import *
+from .sources import *
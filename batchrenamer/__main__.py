@@ -1,8 +1,79 @@
 """Run the batchrenamer as one"""
+import json
 import sys
 from argparse import ArgumentParser
+from contextlib import nullcontext
+from itertools import chain
+from os import path
 
 from batchrenamer import BatchRenamer, __version__
+from batchrenamer.journal import Journal, resume_journal, rollback_journal
+from batchrenamer.planfile import FORMATS, apply_plan
+from batchrenamer.session import save_session
+from batchrenamer.sources import read_file_list, read_names, walk
+
+
+def _recover(func, journal, verb):
+    """Resume or rollback journal and report files that couldn't be moved"""
+    report = func(journal)
+    for failure in report.failed:
+        print(f"Unable to rename {failure.old} -> {failure.new}: {failure.error}")
+    print(f"{len(report.renamed)} files {verb}, {len(report.failed)} failed.")
+    return 1 if report.failed else 0
+
+
+def _apply(plan, journal):
+    """Rename files in a plan file and report files that couldn't be moved"""
+    with Journal(journal) if journal else nullcontext() as journal_:
+        renamed, failed = apply_plan(plan, journal=journal_)
+    for failure in failed:
+        print(f"Unable to rename {failure.old} -> {failure.new}: {failure.error}")
+    print(f"{renamed} files renamed, {len(failed)} failed.")
+    return 1 if failed else 0
+
+
+def _run(renamer, cli_args):
+    """Run the batch script or the interactive prompt"""
+    if cli_args.batch:
+        summary = renamer.batch(cli_args.batch)
+        print(json.dumps(summary))
+        sys.exit(1 if summary["error"] or summary["failed"] else 0)
+    if cli_args.stdin:
+        _reopen_stdin()
+    try:
+        renamer()
+    except KeyboardInterrupt:
+        if renamer.session:
+            save_session(renamer.session, renamer.files, renamer.log)
+            print(f"\nSession saved to {renamer.session}.", end="")
+        raise
+
+
+def _dump_profile(profiler, renamer, filename):
+    """Write profile of the session and stats of each command next to it"""
+    profiler.dump_stats(filename)
+    with open(f"{filename}.json", "w", encoding="utf-8") as fp:
+        records = [stats.as_dict() for stats in renamer.instruments.records]
+        json.dump({"commands": records}, fp, indent=2)
+
+
+def _stream(cli_args):
+    """Filenames from lists, stdin and directory walks, read lazily"""
+    streams = [read_file_list(name, cli_args.null) for name in cli_args.from_files]
+    if cli_args.stdin:
+        streams.append(read_names(sys.stdin, cli_args.null))
+    streams.extend(walk(top, cli_args.globs) for top in cli_args.walks)
+    return chain.from_iterable(streams)
+
+
+def _reopen_stdin():
+    """Read actions from the terminal after stdin was used for filenames"""
+    for tty in ("/dev/tty", "CON"):
+        try:
+            sys.stdin = open(tty, "r", encoding="utf-8")
+        except OSError:
+            continue
+        return
 
 
 def main():
@@ -17,7 +88,7 @@ def main():
         action="version",
         version=f"%(prog)s {__version__}",
     )
-    parser.add_argument("filename", nargs="+", help="list of files to rename")
+    parser.add_argument("filename", nargs="*", help="list of files to rename")
     parser.add_argument(
         "-a",
         "--auto",
@@ -26,13 +97,182 @@ def main():
         help="automated file to run",
         metavar="FILE",
     )
+    parser.add_argument(
+        "--batch",
+        dest="batch",
+        help="run script without prompting, save and print a json summary",
+        metavar="SCRIPT",
+    )
+    parser.add_argument(
+        "--columnar",
+        action="store_true",
+        default=False,
+        help="store files in columns, uses less memory for very large batches",
+    )
+    parser.add_argument(
+        "-j",
+        "--workers",
+        dest="workers",
+        type=int,
+        default=1,
+        help="number of threads to rename files with when saving",
+    )
+    parser.add_argument(
+        "--validate",
+        action="store_true",
+        default=False,
+        help="check files exist when loading them and skip any that don't",
+    )
+    parser.add_argument(
+        "--from-file",
+        dest="from_files",
+        action="append",
+        default=[],
+        help="read list of files to rename from file, one per line",
+        metavar="FILE",
+    )
+    parser.add_argument(
+        "--stdin",
+        dest="stdin",
+        action="store_true",
+        default=False,
+        help="read list of files to rename from stdin, one per line",
+    )
+    parser.add_argument(
+        "-0",
+        "--null",
+        dest="null",
+        action="store_true",
+        default=False,
+        help="file lists are separated by null characters instead of newlines",
+    )
+    parser.add_argument(
+        "--walk",
+        dest="walks",
+        action="append",
+        default=[],
+        help="rename files found recursively in directory",
+        metavar="DIR",
+    )
+    parser.add_argument(
+        "--glob",
+        dest="globs",
+        action="append",
+        default=[],
+        help="only rename walked files whose name matches pattern",
+        metavar="PATTERN",
+    )
+    parser.add_argument(
+        "--show",
+        dest="show",
+        type=int,
+        default=None,
+        help="most changed files to print after each command",
+        metavar="N",
+    )
+    parser.add_argument(
+        "--journal",
+        dest="journal",
+        help="record renames in file so an interrupted save can be recovered",
+        metavar="FILE",
+    )
+    parser.add_argument(
+        "--plan-out",
+        dest="plan_out",
+        help="write renames to file when saving instead of renaming files",
+        metavar="FILE",
+    )
+    parser.add_argument(
+        "--plan-format",
+        dest="plan_format",
+        choices=FORMATS,
+        default="jsonl",
+        help="format of the plan written by --plan-out, defaults to jsonl",
+    )
+    parser.add_argument(
+        "--session",
+        dest="session",
+        help=(
+            "load files and their changes from file if it exists, "
+            "save them to it when quitting"
+        ),
+        metavar="FILE",
+    )
+    parser.add_argument(
+        "--profile",
+        dest="profile",
+        help=(
+            "write a cProfile of the session to file, "
+            "and the time spent by each command to file.json"
+        ),
+        metavar="FILE",
+    )
+    recover = parser.add_mutually_exclusive_group()
+    recover.add_argument(
+        "--resume",
+        dest="resume",
+        help="finish renames an interrupted save left in the journal",
+        metavar="JOURNAL",
+    )
+    recover.add_argument(
+        "--rollback",
+        dest="rollback",
+        help="move files renamed in the journal back to their old names",
+        metavar="JOURNAL",
+    )
+    recover.add_argument(
+        "--apply",
+        dest="apply",
+        help="rename files in a plan written by --plan-out",
+        metavar="PLAN",
+    )
     cli_args = parser.parse_intermixed_args()
+    if cli_args.resume:
+        sys.exit(_recover(resume_journal, cli_args.resume, "renamed"))
+    if cli_args.rollback:
+        sys.exit(_recover(rollback_journal, cli_args.rollback, "rolled back"))
+    if cli_args.apply:
+        sys.exit(_apply(cli_args.apply, cli_args.journal))
+    resuming = cli_args.session and path.exists(cli_args.session)
+    sources = (cli_args.filename, cli_args.from_files, cli_args.stdin, cli_args.walks)
+    if not (any(sources) or resuming):
+        parser.error("the following arguments are required: filename")
+    profiler = None
+    if cli_args.profile:
+        # pylint: disable=import-outside-toplevel
+        from cProfile import Profile
+
+        profiler = Profile()
+        profiler.enable()
     # pylint: disable=not-callable
-    renamer = BatchRenamer(*cli_args.filename, autofiles=cli_args.autofiles)
-    renamer()
+    renamer = BatchRenamer(
+        *cli_args.filename,
+        stream=_stream(cli_args),
+        autofiles=cli_args.autofiles,
+        columnar=cli_args.columnar,
+        workers=cli_args.workers,
+        journal=cli_args.journal,
+        show=cli_args.show,
+        plan_out=cli_args.plan_out,
+        plan_format=cli_args.plan_format,
+        session=cli_args.session,
+        validate=cli_args.validate,
+    )
+    try:
+        _run(renamer, cli_args)
+    finally:
+        if profiler:
+            profiler.disable()
+            _dump_profile(profiler, renamer, cli_args.profile)
 
 
 if __name__ == "__main__":
+    if getattr(sys, "frozen", False):
+        # hash workers start this module again when brp is a frozen executable,
+        # multiprocessing is only imported then to keep startup fast
+        from multiprocessing import freeze_support
+
+        freeze_support()
     try:
         main()
     except KeyboardInterrupt:
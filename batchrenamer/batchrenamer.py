@@ -4,17 +4,30 @@ __all__ = ["BatchRenamer"]
 import re
 import sys
 from argparse import ArgumentError, Namespace
-from copy import deepcopy
+from contextlib import nullcontext, redirect_stdout
+from itertools import chain
+from os import path
 from shlex import split
 
-try:
-    # pylint: disable=unused-import
-    import readline
-except ModuleNotFoundError:
-    print("History not available")
-
-from .filehistory import FileHistory
+from . import transforms
+from .columns import FileColumns
+from .filehistory import FileBatch, FileHistory
+from .hashing import HashCache, default_cache, hash_files
+from .instrument import PHASES, Instruments
+from .journal import Journal
+from .listing import DirectoryListings, check_files
+from .metadata import Metadata
+from .numbering import number_files
+from .oplog import OperationLog
+from .output import TargetIndex, format_changes, page
 from .parser import generate_parser
+from .patterns import PATTERNS
+from .planfile import write_plan
+from .planner import plan_renames
+from .preview import preview
+from .saver import RenameFailure, SaveReport, save_renames
+from .selection import Selections
+from .session import load_session, save_session
 
 CONFIRM = [True, "y", "yes"]
 DENY = [False, "n", "no"]
@@ -24,7 +37,20 @@ BACK = ["b", "back", "q", "quit"]
 class BatchRenamer:
     """Renaming thing"""
 
-    def __init__(self, *filenames, autofiles=None):
+    def __init__(
+        self,
+        *filenames,
+        stream=None,
+        autofiles=None,
+        columnar=False,
+        workers=1,
+        journal=None,
+        show=None,
+        plan_out=None,
+        plan_format="jsonl",
+        session=None,
+        validate=False,
+    ):
         self.parser, help_list = generate_parser(self)
 
         _help_dic = {}
@@ -32,14 +58,63 @@ class BatchRenamer:
             _help_dic.update(_help.cmds)
 
         self._help_dic = _help_dic
-        self._help_text = "\n".join([h.help for h in help_list])
-        self._help_small = "\n".join([f"   {h.usage}" for h in help_list])
-
-        self.files = [FileHistory(filename) for filename in filenames]
+        self._help_list = help_list
+
+        self.columnar = columnar
+        self.session = session
+        self.validate = validate
+        self.listings = DirectoryListings()
+        if session and path.exists(session):
+            self.files, self.log = load_session(session, columnar)
+        else:
+            filenames = chain(filenames, stream or ())
+            if validate:
+                filenames = self._check_files(list(filenames))
+            if columnar:
+                self.files = FileColumns(filenames)
+            else:
+                self.files = FileBatch(FileHistory(filename) for filename in filenames)
+            self.log = OperationLog()
+        self.workers = workers
+        self.journal = journal
+        self.show = show
+        self.plan_out = plan_out
+        self.plan_format = plan_format
+        self.metadata = Metadata()
+        self.selections = Selections()
+        self.instruments = Instruments()
+        self._targets = None
         self.autofiles = autofiles or []
+        self.interactive = True
+        self.saves = []
+
+    def _check_files(self, filenames):
+        """Leave out files that don't exist or aren't files, saying which ones
+
+        They're listed on stderr so the summary printed by --batch stays valid.
+        """
+        problems = check_files(filenames, self.listings)
+        if not problems:
+            return filenames
+        for problem in problems[:10]:
+            print(f"Skipping {problem.filename}: {problem.reason}", file=sys.stderr)
+        if len(problems) > 10:
+            print(f"... and {len(problems) - 10} more", file=sys.stderr)
+        skipped = {problem.filename for problem in problems}
+        return [filename for filename in filenames if filename not in skipped]
+
+    @staticmethod
+    def _load_readline():
+        """Turn on line editing and history for the prompt"""
+        try:
+            # pylint: disable=import-outside-toplevel,unused-import
+            import readline
+        except ModuleNotFoundError:
+            print("History not available")
 
     def __call__(self):
         """Go thru renaming things"""
+        self._load_readline()
         if self.autofiles:
             self.automate(*self.autofiles)
 
@@ -47,94 +122,333 @@ class BatchRenamer:
             response = input("Action: ")
             args = split(response)
             args[0] = args[0].lower()
-            try:
-                resp_args = self.parser.parse_args(args)
-            except ArgumentError as e:
-                error_args = Namespace()
-                if e.message.startswith("unrecognized arguments"):
-                    print("ERROR: Invalid argument\n")
-                    setattr(error_args, "subparsers", [args[0]])
-                elif e.message.startswith("invalid choice"):
-                    print("ERROR: Unknown command")
-                    setattr(error_args, "small", True)
+            with self.instruments.command(args[0]) as stats:
+                try:
+                    with self.instruments.phase("parse"):
+                        resp_args = self.parser.parse_args(args)
+                except ArgumentError as e:
+                    error_args = Namespace()
+                    if e.message.startswith("unrecognized arguments"):
+                        print("ERROR: Invalid argument\n")
+                        setattr(error_args, "subparsers", [args[0]])
+                    elif e.message.startswith("invalid choice"):
+                        print("ERROR: Unknown command")
+                        setattr(error_args, "small", True)
+                    else:
+                        print(e.message)
+                    self.print_help(error_args)
                 else:
-                    print(e.message)
-                self.print_help(error_args)
-            else:
-                resp_args.func(resp_args)
-
-    @staticmethod
-    def _low_input(message):
+                    stats.command = resp_args.command
+                    resp_args.func(resp_args)
+
+    def _input(self, message, default=None):
+        """Get user input, fails when not running interactively without a default"""
+        if not self.interactive:
+            if default is not None:
+                return default
+            raise ArgumentError(None, f"missing value for '{message.strip(' :?')}'")
+        return input(message)
+
+    def _low_input(self, message):
         """Get user input and lower it"""
-        return input(message).lower()
-
-    def _print_file_changes(self, args=None):
+        return self._input(message).lower()
+
+    def _edit_input(self, message, text):
+        """Get user input with text already typed in so it can be edited"""
+        readline = sys.modules.get("readline")
+        if readline is None or not text:
+            return self._input(message)
+        readline.set_startup_hook(lambda: readline.insert_text(text))
+        try:
+            return self._input(message)
+        finally:
+            readline.set_startup_hook()
+
+    def _record(self, command, changes):
+        """Log changes made by a command"""
+        self._record_pass([(command, changes)])
+
+    def _record_pass(self, records):
+        """Log changes made in one pass over the files, each separately
+
+        Files can change more than once in a pass, so the indices are only
+        updated once, from the name each file had before the pass.
+        """
+        first = {}
+        for _, changes in records:
+            self.instruments.change(changes)
+        with self.instruments.phase("log"):
+            for command, changes in records:
+                self.log.record(command, changes)
+                for idx, before in changes.items():
+                    first.setdefault(idx, before)
+            if self._targets is not None:
+                self._targets.update(self.files, first)
+            self.selections.update(self.files, first)
+
+    def _restore(self, changes):
+        """Put files back to the names in changes"""
+        self.instruments.touch(len(changes))
+        self.instruments.change(changes)
+        with self.instruments.phase("log"):
+            # the indices are updated from the names the files had until now
+            before = {idx: self.files[idx].rename for idx in changes}
+            self.files.restore(changes)
+            if self._targets is not None:
+                self._targets.update(self.files, before)
+            self.selections.update(self.files, before)
+
+    def _scope(self):
+        """Indices of the files commands run on, None for every file"""
+        scope = self.selections.indices
+        self.instruments.touch(len(self.files) if scope is None else len(scope))
+        return scope
+
+    def _print_file_changes(self, args=None, indices=None):
+        """Print old and new name of changed files, or every file if not given"""
         if getattr(args, "automated", False):
             return
-        for file_ in self.files:
-            file_.print_changes()
-        print("-" * 20)
+        with self.instruments.phase("print"):
+            self._print_changes(args, indices)
+
+    def _print_changes(self, args, indices):
+        limit = getattr(args, "top", None) or self.show
+        text, hidden = format_changes(self.files, indices, limit)
+        if hidden:
+            text += f"... and {hidden} more\n\n"
+        if self._targets is None:
+            self._targets = TargetIndex(self.files)
+        total = len(self.files)
+        if indices is None:
+            collisions = self._targets.collisions(self.files, range(total))
+            summary = f"{total} files, {collisions} collisions"
+        else:
+            collisions = self._targets.collisions(self.files, indices)
+            summary = (
+                f"{len(indices)} changed, {total - len(indices)} unchanged, "
+                f"{collisions} collisions"
+            )
+        page(f"{text}{'-' * 20}\n{summary}\n", self.interactive)
 
     def automate_manual(self, args):
         """Pass in manual automation filenames"""
-        filenames = args.filenames or split(input("Filepath(s): "))
+        filenames = args.filenames or split(self._input("Filepath(s): "))
         self.automate(*filenames)
 
+    def compile_script(self, lines, source="script"):
+        """Parse every line of a script into commands before any are run
+
+        :param lines: lines of the script
+        :type lines: Iterable[str]
+        :param source: name of the script used in error messages
+        :type source: str
+        :raises ArgumentError: line isn't a valid command
+        :return: parsed commands in order
+        :rtype: list[Namespace]
+        """
+        commands = []
+        for num, line in enumerate(lines, 1):
+            split_args = self.parser.convert_arg_line_to_args(line)
+            if not split_args:
+                continue
+            try:
+                args = self.parser.parse_args(split_args)
+            except ArgumentError as e:
+                raise ArgumentError(None, f"{source}:{num}: {e.message}") from e
+            setattr(args, "automated", True)
+            setattr(args, "line", num)
+            commands.append(args)
+        return commands
+
     def automate(self, *autofiles):
         """Take file with list of commands and make those changes"""
         for autofile in autofiles:
             try:
                 with open(autofile, "r", encoding="utf-8") as fp:
-                    lines = fp.readlines()
+                    commands = self.compile_script(fp, autofile)
+                stages = self.compile_pipeline(commands, autofile)
             except FileNotFoundError:
                 print(
                     f"Unable to open {autofile}; moving to next file provided (if any)"
                 )
+            except ArgumentError as e:
+                print(f"ERROR: {e.message}; moving to next file provided (if any)")
             else:
-                for line in lines:
-                    split_args = self.parser.convert_arg_line_to_args(line)
-                    if split_args:
-                        args = self.parser.parse_args(split_args)
-                        setattr(args, "automated", True)
-                        args.func(args)
+                self.run_pipeline(stages)
+
+    def batch(self, script):
+        """Run script without prompting, then save the files
+
+        Anything the commands print goes to stderr. A command missing a
+        value stops the script without saving.
+
+        :param script: file with list of commands
+        :type script: str
+        :return: summary of the run
+        :rtype: dict
+        """
+        self.interactive = False
+        summary = {
+            "files": len(self.files),
+            "commands": 0,
+            "renamed": 0,
+            "failed": [],
+            "error": None,
+        }
+        try:
+            with open(script, "r", encoding="utf-8") as fp:
+                commands = self.compile_script(fp, script)
+            stages = self.compile_pipeline(commands, script)
+        except OSError as e:
+            summary["error"] = f"Unable to open {script}: {e.strerror}"
+            return summary
+        except ArgumentError as e:
+            summary["error"] = e.message
+            return summary
+
+        for args in commands:
+            setattr(args, "confirm", True)
+        with redirect_stdout(sys.stderr):
+            line = None
+            try:
+                for stage in stages:
+                    # fused stages are reported at the line they start on
+                    line = (stage[0] if isinstance(stage, list) else stage).line
+                    summary["commands"] += self.run_pipeline([stage])
+                line = None
+                with self.instruments.command("save"):
+                    self._save_files(self.workers)
+            except ArgumentError as e:
+                summary["error"] = f"{script}:{line}: {e.message}"
+            except (re.error, OSError) as e:
+                summary["error"] = f"{script}:{line}: {e}"
+            except SystemExit:
+                # quit or write ends the script, write has already saved
+                summary["commands"] += 1
+
+        for report in self.saves:
+            summary["renamed"] += len(report.renamed)
+            summary["failed"].extend(
+                {"old": fail.old, "new": fail.new, "error": str(fail.error)}
+                for fail in report.failed
+            )
+        return summary
+
+    def _run_transforms(self, commands):
+        """Run transforms of commands in a single pass, each is logged separately"""
+        funcs = [args.transform(args) for args in commands]
+        scope = self._scope()
+        with self.instruments.phase("transform"):
+            results = self.files.apply(funcs, scope)
+        self._record_pass(
+            [(args.command, changes) for args, changes in zip(commands, results)]
+        )
+        changed = set().union(*results)
+        self._print_file_changes(commands[-1], changed)
+
+    def compile_pipeline(self, commands, source="script"):
+        """Group runs of commands that only transform names so they share a pass
+
+        :param commands: parsed commands from :meth:`compile_script`
+        :type commands: list[Namespace]
+        :param source: name of the script used in error messages
+        :type source: str
+        :raises ArgumentError: command has an invalid pattern
+        :return: stages to run in order, either a list of commands to run
+            with :meth:`_run_transforms` or a single command to call normally
+        :rtype: list[list[Namespace] | Namespace]
+        """
+        stages = []
+        fused = []
+        for args in commands:
+            transform = getattr(args, "transform", None)
+            try:
+                func = transform(args) if transform else None
+            except re.error as e:
+                raise ArgumentError(
+                    None, f"{source}:{args.line}: invalid pattern: {e}"
+                ) from e
+            if func is not None:
+                fused.append(args)
+                continue
+            if fused:
+                stages.append(fused)
+                fused = []
+            stages.append(args)
+        if fused:
+            stages.append(fused)
+        return stages
+
+    def run_pipeline(self, stages):
+        """Run stages from :meth:`compile_pipeline`, get number of commands run"""
+        count = 0
+        for stage in stages:
+            if isinstance(stage, list):
+                name = "+".join(args.command for args in stage)
+                with self.instruments.command(name):
+                    self._run_transforms(stage)
+                count += len(stage)
+            else:
+                count += 1
+                with self.instruments.command(stage.command):
+                    stage.func(stage)
+        return count
+
+    def case_transform(self, args):
+        """Transform for case command, None if styles are missing"""
+        if not args.styles:
+            return None
+        return transforms.case(args.styles, args.seed)
 
     def change_case(self, args):
         """Change the case of the filenames"""
-        styles = args.styles or split(input("Styles?: "))
-        for file_ in self.files:
-            file_.change_case(styles)
-        self._print_file_changes(args)
+        args.styles = args.styles or split(self._input("Styles?: "))
+        scope = self._scope()
+        with self.instruments.phase("transform"):
+            changes = self.files.change_case(args.styles, scope, seed=args.seed)
+        self._record(args.command, changes)
+        self._print_file_changes(args, changes)
 
     def append(self, args):
         """Append value to filenames either from a file or manually provided"""
-        setattr(args, "side", r"$")
-        setattr(args, "replace", args.append)
-        setattr(args, "value", "{pad}{repl}")
         self._pend(args, "Append")
 
     def prepend(self, args):
         """Prepend value to filenames either from a file or manually provided"""
-        setattr(args, "side", r"^")
-        setattr(args, "replace", args.prepend)
-        setattr(args, "value", "{repl}{pad}")
         self._pend(args, "Prepend")
 
+    def pend_transform(self, args):
+        """Transform for append and prepend, None if values are missing"""
+        if args.filenames or not args.find or args.replace is None:
+            return None
+        return self._pend_func(args)
+
+    @staticmethod
+    def _pend_func(args):
+        repl = args.value.format(pad=args.padding, repl=args.replace)
+        return transforms.pend(args.find, args.side, repl)
+
     def _pend(self, args, msg="Pend"):
         """Add value to begining or end of filename from a file or manaully provided"""
+        changed = set()
         if not args.filenames and not args.find and not args.replace:
             do_files = self._low_input("Load from files? Yes or No?: ")
             if do_files in CONFIRM:
-                self._pend_file(args)
+                changed.update(self._pend_file(args))
         elif args.filenames:
-            self._pend_file(args)
+            changed.update(self._pend_file(args))
         if args.find or args.replace or not args.filenames:
-            self._pend_manual(args, msg)
-        self._print_file_changes(args)
+            changed.update(self._pend_manual(args, msg))
+        self._print_file_changes(args, changed)
 
-    def _pend_file(self, og_args):
-        """Add value to begining or end of filename from file"""
-        args = deepcopy(og_args)
-        for filename in args.filenames:
+    def _pend_file(self, args):
+        """Add value to begining or end of filename from file
+
+        Every line of the files is looked up in the same pass over the
+        filenames but is logged as its own change.
+        """
+        pairs = []
+        for filename in args.filenames or split(self._input("Filepath(s): ")):
             try:
                 with open(filename, "r", encoding="utf-8") as fp:
                     lines = fp.readlines()
@@ -147,52 +461,210 @@ class BatchRenamer:
                     find, repl = temp[:2]
                 except ValueError:
                     continue
-                setattr(args, "find", find)
-                setattr(args, "replace", repl)
-                self._pend_manual(args)
+                pairs.append((find, args.value.format(pad=args.padding, repl=repl)))
+        steps = transforms.pend_index(pairs, args.side)
+        scope = self._scope()
+        with self.instruments.phase("transform"):
+            results = self.files.apply_steps(steps, len(pairs), scope)
+        self._record_pass([(args.command, changes) for changes in results])
+        return set().union(*results)
 
     def _pend_manual(self, args, msg=None):
         """Add value to begining or end of filename"""
         if not args.find:
-            find = input("Find: ")
-            setattr(args, "find", find)
-        if not args.replace:
-            repl = args.replace or input(f"{msg}: ")
-            setattr(args, "replace", repl)
-        for file_ in self.files:
-            if re.search(args.find, file_.rename.name):
-                repl = args.value.format(pad=args.padding, repl=args.replace)
-                file_.replace(args.side, repl)
+            args.find = self._input("Find: ")
+        if args.replace is None:
+            args.replace = self._input(f"{msg}: ")
+        scope = self._scope()
+        with self.instruments.phase("transform"):
+            changes = self.files.apply([self._pend_func(args)], scope)[0]
+        self._record(args.command, changes)
+        return changes
+
+    def _file_keys(self, key, indices=None):
+        """Indices of files keyed by their path, filename or stem"""
+        keyed = {}
+        for idx in range(len(self.files)) if indices is None else indices:
+            info = self.files[idx].rename
+            if key == "path":
+                # the same file given as a.txt and ./a.txt is one key
+                value = path.normpath(info.fullname)
+            elif key == "name":
+                value = f"{info.name}{info.ext}"
+            else:
+                value = info.name
+            keyed.setdefault(value, []).append(idx)
+        return keyed
+
+    def map_names(self, args):
+        """Rename files to the new names in tables of old and new names
+
+        Tables are read one row at a time and looked up in an index of the
+        files, so the whole table is never held in memory.
+        """
+        # pylint: disable=import-outside-toplevel
+        import csv
+
+        tables = args.filenames or split(self._input("Table(s): "))
+        scope = self._scope()
+        keyed = self._file_keys(args.key, scope)
+        updates = {}
+        unmatched = []
+        unmatched_count = 0
+        invalid = []
+        invalid_count = 0
+        for table in tables:
+            delimiter = args.delimiter
+            if delimiter is None:
+                delimiter = "\t" if table.lower().endswith(".tsv") else ","
+            try:
+                fp = open(table, "r", encoding="utf-8", newline="")
+            except FileNotFoundError:
+                print(f"Unable to open {table}; moving to next file provided")
+                continue
+            with fp:
+                rows = csv.reader(fp, delimiter=delimiter)
+                if args.header:
+                    next(rows, None)
+                for row in rows:
+                    if len(row) < 2 or row[0].startswith("#"):
+                        continue
+                    old, new = row[:2]
+                    if not new or path.basename(new) != new:
+                        invalid_count += 1
+                        if len(invalid) < 10:
+                            invalid.append(f"{old} -> {new}")
+                        continue
+                    if args.key == "path":
+                        old = path.normpath(old)
+                    indices = keyed.get(old)
+                    if indices is None:
+                        unmatched_count += 1
+                        if len(unmatched) < 10:
+                            unmatched.append(old)
+                        continue
+                    for idx in indices:
+                        if args.key == "stem":
+                            updates[idx] = (new, self.files[idx].rename.ext)
+                        else:
+                            updates[idx] = path.splitext(new)
+        changes = self.files.assign(updates)
+        self._record(args.command, changes)
+        self._print_file_changes(args, changes)
+        if unmatched_count:
+            print(f"{unmatched_count} rows didn't match a file:")
+            print("\n".join(f"   {old}" for old in unmatched))
+        if invalid_count:
+            print(f"{invalid_count} rows had a new name that isn't a filename:")
+            print("\n".join(f"   {row}" for row in invalid))
+        scope = range(len(self.files)) if scope is None else scope
+        missed = len(scope) - len(updates)
+        if missed:
+            sample = (idx for idx in scope if idx not in updates)
+            print(f"{missed} files weren't in the table:")
+            for idx, _ in zip(sample, range(10)):
+                print(f"   {self.files[idx].rename.fullname}")
+
+    def number(self, args):
+        """Number files in sorted order using a name template"""
+        args.template = args.template or self._input("Template: ")
+        indices = self.selections.indices
+        if args.pattern:
+            indices = self.files.match(args.pattern, indices)
+        self.instruments.touch(len(self.files) if indices is None else len(indices))
+        try:
+            with self.instruments.phase("transform"):
+                updates = number_files(
+                    self.files,
+                    args.template,
+                    start=args.start,
+                    step=args.step,
+                    key=args.key,
+                    per_directory=args.per_directory,
+                    reverse=args.reverse,
+                    indices=indices,
+                    metadata=self.metadata,
+                )
+        except ValueError as e:
+            print(f"Invalid template {e}")
+            return
+        changes = self.files.assign(updates)
+        self._record(args.command, changes)
+        self._print_file_changes(args, changes)
+        total = len(self.files) if indices is None else len(indices)
+        skipped = total - len(updates)
+        if skipped:
+            print(f"{skipped} files skipped, unable to read their metadata")
+
+    def hash_names(self, args):
+        """Rename files to the digest of their contents"""
+        indices = self.selections.indices
+        if args.pattern:
+            indices = self.files.match(args.pattern, indices)
+        if indices is None:
+            indices = range(len(self.files))
+        paths = {idx: self.files[idx].current.fullname for idx in indices}
+        self.instruments.touch(len(paths))
+        with self.instruments.phase("io"):
+            cache = None if args.no_cache else HashCache(args.cache or default_cache())
+            digests = hash_files(
+                paths.values(),
+                algorithm=args.algorithm,
+                workers=args.workers or self.workers,
+                cache=cache,
+            )
+        updates = {}
+        unread = []
+        for idx, filename in paths.items():
+            digest = digests[filename]
+            if digest is None:
+                unread.append(filename)
             else:
-                file_.noop()
+                updates[idx] = (digest[: args.length], self.files[idx].rename.ext)
+        changes = self.files.assign(updates)
+        self._record(args.command, changes)
+        self._print_file_changes(args, changes)
+        if unread:
+            print(f"{len(unread)} files couldn't be read:")
+            print("\n".join(f"   {filename}" for filename in unread[:10]))
+
+    def extension_transform(self, args):
+        """Transform for extension command, None if values are missing"""
+        if not args.ext or (args.pattern is None and self.interactive):
+            return None
+        return transforms.extension(args.ext, args.pattern)
 
     def change_ext(self, args):
         """Change file extension for files"""
-        repl = args.ext or input("New Ext: ")
-        pattern = args.pattern or input("Match Pattern (Leave blank for no pattern): ")
-        for file_ in self.files:
-            file_.change_ext(repl, pattern)
-        self._print_file_changes(args)
+        args.ext = args.ext or self._input("New Ext: ")
+        if args.pattern is None:
+            args.pattern = self._input(
+                "Match Pattern (Leave blank for no pattern): ", default=""
+            )
+        self._run_transforms([args])
 
     def print_help(self, args=None):
         """Display help message"""
         if args is None or getattr(args, "small", False):
-            print(self._help_small)
+            print("\n".join([f"   {h.usage}" for h in self._help_list]))
             return
         commands = [s for s in getattr(args, "commands", []) if s in self._help_dic]
         if not commands:
-            print(self._help_text)
+            print("\n".join([h.help for h in self._help_list]))
             return
         for sub in args.commands:
             print(self._help_dic[sub].help)
 
     def insert_string(self, args):
         """Insert value in specific position"""
-        val = args.value or input("Insert: ")
-        test_file = self.files[0].rename.name
+        val = args.value or self._input("Insert: ")
+        scope = self.selections.indices
+        test_file = self.files[scope[0] if scope else 0].rename.name
         while True:
             try:
-                num = args.index or int(input("Index: "))
+                num = args.index
+                if num is None:
+                    num = int(self._input("Index: "))
             except ValueError:
                 print("Please enter a positive or negative integer.")
             else:
@@ -204,8 +676,10 @@ class BatchRenamer:
                     idx = (-1 * num) if num > (-1 * test_len) else 0
                     find = r"^(.*?)(.{" f"{idx}" r"})$"
                 repl = r"\1" f"{val}" r"\2"
-                test = re.sub(find, repl, test_file)
-                print(f"Example: {test}")
+                func = transforms.replace(find, repl)
+                first = next(preview(self.files, func, scope, sample=3))
+                for _, _, (new_name, _) in first.sample:
+                    print(f"Example: {new_name}")
                 good = args.confirm or self._low_input("Right index? ")
                 if good in CONFIRM:
                     break
@@ -216,28 +690,49 @@ class BatchRenamer:
             print()
         setattr(args, "find", find)
         setattr(args, "replace", repl)
+        setattr(args, "transform", self.replace_transform)
         self.find_and_replace(args)
 
-    def list_file_changes(self, _):
+    def list_file_changes(self, args):
         """List the current changes to the files"""
-        self._print_file_changes()
+        self._print_file_changes(args)
 
     def history(self, args):
         """Print history of file changes"""
         if args.peak:
-            self.files[0].print_history()
+            self.files[0].print_history(self.log.past(0))
             return
-        for file_ in self.files:
-            file_.print_history()
+        for idx, file_ in enumerate(self.files):
+            file_.print_history(self.log.past(idx))
         print("-" * 20)
 
+    def stats(self, args):
+        """Print time spent and files changed by recent commands"""
+        if args.clear:
+            self.instruments.clear()
+            print("Stats cleared.")
+            return
+        records = list(self.instruments.records)[-args.last :] if args.last else []
+        header = f"{'command':<16} {'seconds':>8} {'touched':>8} {'changed':>8}"
+        print(header + "".join(f" {phase:>9}" for phase in PHASES))
+        for stats in records:
+            row = (
+                f"{stats.command[:16]:<16} {stats.seconds:8.3f} "
+                f"{stats.touched:8d} {stats.changed:8d}"
+            )
+            print(row + "".join(f" {stats.phases[phase]:9.3f}" for phase in PHASES))
+        info = PATTERNS.info()
+        print(
+            f"patterns: {info.hits} hits, {info.misses} misses, "
+            f"{info.currsize}/{info.maxsize} cached"
+        )
+
     def reset(self, args):
         """Reset filenames"""
         really = args.confirm or self._low_input("Really reset? No undoing this action. ")
         while True:
             if really in CONFIRM:
-                for file_ in self.files:
-                    file_.reset()
+                self._restore(self.log.rewind())
                 break
             if really in DENY:
                 break
@@ -248,19 +743,180 @@ class BatchRenamer:
         really = args.confirm or self._low_input("Are you sure you want to quit? ")
         while True:
             if really in CONFIRM:
+                if self.session:
+                    save_session(self.session, self.files, self.log)
                 print("Thanks for using!")
                 sys.exit()
             if really in DENY:
                 break
             really = self._low_input("Yes or No? ")
 
+    def save_snapshot(self, args):
+        """Save the files and their changes so the session can be loaded later"""
+        filename = args.filename or self.session or self._input("Session file: ")
+        try:
+            save_session(filename, self.files, self.log)
+        except OSError as e:
+            print(f"Unable to save session to {filename}: {e.strerror}")
+            return
+        print(f"Session saved to {filename}.")
+
+    def load_snapshot(self, args):
+        """Replace the files and their changes with a saved session"""
+        filename = args.filename or self.session or self._input("Session file: ")
+        try:
+            self.files, self.log = load_session(filename, self.columnar)
+        except OSError as e:
+            print(f"Unable to load session from {filename}: {e.strerror}")
+            return
+        except (ValueError, KeyError, TypeError):
+            print(f"Unable to load session from {filename}: not a session file")
+            return
+        self._targets = None
+        self.selections.clear()
+        print(f"Loaded {len(self.files)} files and {len(self.log)} changes.")
+
+    @staticmethod
+    def _criteria(args):
+        """Selection criteria given to select or filter, empty if there are none"""
+        criteria = {
+            "globs": args.globs,
+            "regexes": args.regexes,
+            "exts": args.exts,
+            "dirs": args.dirs,
+        }
+        return criteria if any(criteria.values()) else {}
+
+    def _print_selections(self):
+        """List saved selections, the active one is starred"""
+        active = self.selections.active
+        print(f"{' ' if active else '*'} all: {len(self.files)} files")
+        for name, indices in self.selections.named.items():
+            print(f"{'*' if name == active else ' '} {name}: {len(indices)} files")
+
+    def select(self, args):
+        """Select files that later commands run on, or switch selections"""
+        criteria = self._criteria(args)
+        if args.name is None and not criteria:
+            self._print_selections()
+            return
+        if args.name == "all":
+            if criteria:
+                print("Selection can't be named all.")
+                return
+            self.selections.use(None)
+            print(f"All {len(self.files)} files selected.")
+            return
+        if criteria:
+            name = args.name or "selection"
+            self.instruments.touch(len(self.files))
+            self.selections.add(name, self.selections.find(self.files, **criteria))
+        else:
+            name = args.name
+            try:
+                self.selections.use(name)
+            except KeyError:
+                print(f"No selection named {name}.")
+                return
+        print(f"{len(self.selections.indices)} files selected as {name}.")
+
+    def filter_selection(self, args):
+        """Narrow the active selection down to files that also match"""
+        criteria = self._criteria(args)
+        if not criteria:
+            print("Nothing to filter by.")
+            return
+        name = args.name or self.selections.active or "selection"
+        if name == "all":
+            print("Selection can't be named all.")
+            return
+        scope = self._scope()
+        indices = self.selections.find(self.files, scope, **criteria)
+        self.selections.add(name, indices)
+        print(f"{len(indices)} files selected as {name}.")
+
+    @staticmethod
+    def _print_sample(sample):
+        for _, (name, ext), (new_name, new_ext) in sample:
+            print(f"   {name}{ext} -> {new_name}{new_ext}")
+
+    def _show_preview(self, func, sample):
+        """Print the first files func changes and count the rest as they're checked
+
+        Ctrl-C stops counting and keeps the prompt going.
+        """
+        scope = self._scope()
+        progress = None
+        shown = False
+        status = ""
+        live = self.interactive and sys.stdout.isatty()
+        try:
+            with self.instruments.phase("transform"):
+                for progress in preview(self.files, func, scope, sample):
+                    full = len(progress.sample) >= sample or progress.finished
+                    if full and not shown:
+                        self._print_sample(progress.sample)
+                        shown = True
+                    if live:
+                        status = (
+                            f"{progress.changed} changed, "
+                            f"checked {progress.checked}/{progress.total}"
+                        )
+                        print(f"\r{status}", end="", flush=True)
+        except KeyboardInterrupt:
+            pass
+        if progress is None:
+            return
+        if status:
+            print(f"\r{' ' * len(status)}\r", end="")
+        if not shown:
+            self._print_sample(progress.sample)
+        stopped = "" if progress.finished else f" of the first {progress.checked}"
+        print(f"{progress.changed} files would change{stopped}.")
+
+    def preview_replace(self, args):
+        """Try find and replace patterns on the files before applying one"""
+        find, repl = args.find, args.replace
+        while True:
+            find = find or self._edit_input("Find: ", args.find)
+            if repl is None:
+                repl = self._edit_input("Repl: ", args.replace)
+            args.find, args.replace = find, repl
+            try:
+                func = transforms.replace(find, repl)
+            except re.error as e:
+                print(f"Invalid pattern: {e}")
+            else:
+                self._show_preview(func, args.sample)
+            if getattr(args, "automated", False) or not self.interactive:
+                return
+            answer = self._low_input("Apply? Yes, No to edit or Back: ")
+            if answer in CONFIRM:
+                apply_args = Namespace(
+                    command="replace",
+                    find=find,
+                    replace=repl,
+                    transform=self.replace_transform,
+                    top=None,
+                )
+                self._run_transforms([apply_args])
+                return
+            if answer in BACK:
+                return
+            find = repl = None
+
+    def replace_transform(self, args):
+        """Transform for replace command, None if values are missing"""
+        if not args.find or args.replace is None:
+            return None
+        return transforms.replace(args.find, args.replace)
+
     def find_and_replace(self, args):
         """Find pattern and replace with new pattern"""
-        find = args.find or input("Find: ")
-        repl = args.replace or input("Repl: ")
-        for file_ in self.files:
-            file_.replace(find, repl)
-        self._print_file_changes(args)
+        args.find = args.find or self._input("Find: ")
+        if args.replace is None:
+            args.replace = self._input("Repl: ")
+        self._run_transforms([args])
 
     def save(self, args):
         """Save name changes"""
@@ -269,27 +925,74 @@ class BatchRenamer:
         )
         while True:
             if really in CONFIRM:
-                for file_ in self.files:
-                    file_.save()
-                print("Files renamed.")
+                self._save_files(getattr(args, "workers", None) or self.workers)
                 break
             if really in DENY:
                 print("No files renamed.")
                 break
             really = self._low_input("Yes or No? ")
 
+    @staticmethod
+    def _print_progress(done, total):
+        print(f"\rRenamed {done}/{total}", end="\n" if done == total else "")
+
+    def _save_files(self, workers):
+        """Rename files on disk and report any that failed"""
+        with self.instruments.phase("plan"):
+            exists = path.lexists
+            if self.validate:
+                # reuse listings from loading, relisting directories that changed
+                self.listings.refresh()
+                exists = self.listings.exists
+            plan = plan_renames(self.files.pending(), exists)
+        renames = sum(1 for chain in plan.chains for step in chain if not step.partial)
+        self.instruments.touch(len(plan.conflicts) + renames)
+        if self.plan_out:
+            return self._write_plan(plan)
+        with self.instruments.phase("io"), (
+            Journal(self.journal) if self.journal else nullcontext()
+        ) as journal:
+            report = save_renames(
+                plan.chains,
+                workers=workers,
+                progress=self._print_progress,
+                journal=journal,
+            )
+        self.instruments.change(report.renamed)
+        self.files.mark_saved(report.renamed)
+        for failure in report.failed:
+            print(f"Unable to rename {failure.old} -> {failure.new}: {failure.error}")
+        for conflict in plan.conflicts:
+            print(f"Skipping {conflict.old} -> {conflict.new}: {conflict.reason}")
+            report.failed.append(RenameFailure(*conflict))
+        if report.failed:
+            print(f"{len(report.failed)} files not renamed.")
+        print("Files renamed.")
+        self.saves.append(report)
+        return report
+
+    def _write_plan(self, plan):
+        """Write plan to the plan file instead of renaming files"""
+        with self.instruments.phase("io"):
+            count = write_plan(
+                self.plan_out, plan.chains, binary=self.plan_format == "binary"
+            )
+        report = SaveReport([], [])
+        for conflict in plan.conflicts:
+            print(f"Skipping {conflict.old} -> {conflict.new}: {conflict.reason}")
+            report.failed.append(RenameFailure(*conflict))
+        print(f"{count} renames written to {self.plan_out}.")
+        self.saves.append(report)
+        return report
+
     def undo(self, args):
         """Undo last changes"""
-        undone_all = True
-        for _ in range(args.number):
-            for file_ in self.files:
-                undone_all = file_.undo()
-                if not undone_all:
-                    break
-            if not undone_all:
-                break
-        if undone_all and not getattr(args, "automated", False):
-            self._print_file_changes()
+        changes, undone = self.log.unwind(args.number)
+        # files changed by several of the operations are only restored once
+        self._restore(changes)
+        undone_all = undone == args.number
+        if undone_all:
+            self._print_file_changes(args, changes)
         print(
             ("Last " if undone_all else "All ")
             + "change"
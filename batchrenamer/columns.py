@@ -0,0 +1,271 @@
+"""Columnar storage for large batches of files"""
+__all__ = ["FileColumns", "ColumnView"]
+
+from array import array
+from os import path
+from sys import intern
+
+from . import strcase, transforms
+from .filehistory import FileHistory, FileInfo
+from .patterns import compile_pattern
+
+
+class ColumnView:
+    """Read only :class:`~batchrenamer.FileHistory` style view of one file
+
+    :param columns: columns the file is stored in
+    :type columns: FileColumns
+    :param index: position of the file in the columns
+    :type index: int
+    """
+
+    __slots__ = ("_columns", "index")
+
+    def __init__(self, columns, index):
+        self._columns = columns
+        self.index = index
+
+    def _info(self, state):
+        names, exts = state
+        return FileInfo(
+            self._columns.directory(self.index),
+            names[self.index],
+            exts[self.index],
+        )
+
+    @property
+    def original(self):
+        """Name of file when loaded"""
+        return self._info(self._columns.original)
+
+    @property
+    def current(self):
+        """Name of file on disk"""
+        return self._info(self._columns.current)
+
+    @property
+    def rename(self):
+        """Name file will be saved as"""
+        return self._info((self._columns.names, self._columns.exts))
+
+    def save(self):
+        """Save new filename"""
+        self.move()
+        self._columns.mark_saved([self.index])
+
+    move = FileHistory.move
+    print_changes = FileHistory.print_changes
+    print_history = FileHistory.print_history
+
+
+class FileColumns:
+    """Files stored as parallel columns of directories, names and extensions
+
+    Directories are stored once in a table and referenced by index, and
+    extensions are interned, so the per file cost is roughly one name string.
+    Changes are made in a single pass over the columns and return the
+    previous :class:`~batchrenamer.FileInfo` of each file they changed keyed
+    by index, the same as :class:`~batchrenamer.FileBatch`.
+
+    :param filenames: paths of the files to rename
+    :type filenames: Iterable[str]
+    """
+
+    def __init__(self, filenames):
+        self.directories = []
+        self.dir_index = array("L")
+        dir_ids = {}
+        names = []
+        exts = []
+        for fullname in filenames:
+            directory = path.dirname(fullname) or "."
+            name, ext = path.splitext(path.basename(fullname))
+            dir_id = dir_ids.get(directory)
+            if dir_id is None:
+                dir_id = dir_ids[directory] = len(self.directories)
+                self.directories.append(intern(directory))
+            self.dir_index.append(dir_id)
+            names.append(name)
+            exts.append(intern(ext))
+        self.original = (names, exts)
+        self.current = self.original
+        self.names = names.copy()
+        self.exts = exts.copy()
+
+    @classmethod
+    def from_columns(cls, directories, dir_index, original, current, names, exts):
+        """Create columns from columns that were already split up
+
+        :param directories: table of directories
+        :type directories: list[str]
+        :param dir_index: position in directories of each file's directory
+        :type dir_index: Iterable[int]
+        :param original: names and extensions when loaded
+        :type original: tuple[list[str], list[str]]
+        :param current: names and extensions on disk, None if same as original
+        :type current: tuple[list[str], list[str]]
+        :param names: new names
+        :type names: list[str]
+        :param exts: new extensions
+        :type exts: list[str]
+        """
+        columns = cls.__new__(cls)
+        columns.directories = [intern(directory) for directory in directories]
+        columns.dir_index = array("L", dir_index)
+        columns.original = (original[0], [intern(ext) for ext in original[1]])
+        if current is None:
+            columns.current = columns.original
+        else:
+            columns.current = (current[0], [intern(ext) for ext in current[1]])
+        columns.names = names
+        columns.exts = [intern(ext) for ext in exts]
+        return columns
+
+    def __len__(self):
+        return len(self.names)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("file index out of range")
+        return ColumnView(self, index)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield ColumnView(self, index)
+
+    def directory(self, index):
+        """Get directory of file at index"""
+        return self.directories[self.dir_index[index]]
+
+    def info(self, index):
+        """Get new name of file at index"""
+        return FileInfo(self.directory(index), self.names[index], self.exts[index])
+
+    def fullname(self, index, state=None):
+        """Get full name of file at index, defaults to the new name"""
+        names, exts = state or (self.names, self.exts)
+        return FileHistory.fullname(self.directory(index), names[index], exts[index])
+
+    def match(self, pattern, indices=None):
+        """Get indices of files whose name matches pattern, out of indices if given"""
+        search = compile_pattern(pattern).search
+        names = self.names
+        if indices is None:
+            return [idx for idx, name in enumerate(names) if search(name)]
+        return [idx for idx in indices if search(names[idx])]
+
+    def iter_names(self, indices=None):
+        """Index, new name and new extension of files, all of them by default"""
+        names = self.names
+        exts = self.exts
+        for idx in range(len(names)) if indices is None else indices:
+            yield idx, names[idx], exts[idx]
+
+    def apply(self, funcs, indices=None):
+        """Run transforms in order over the files in a single pass
+
+        :param funcs: transforms from :mod:`~batchrenamer.transforms`
+        :type funcs: list[Callable[[str, str], tuple[str, str]]]
+        :param indices: files to run on, defaults to all of them
+        :type indices: Iterable[int]
+        :return: changes made by each transform
+        :rtype: list[dict[int, FileInfo]]
+        """
+        return self.apply_steps(transforms.steps(funcs), len(funcs), indices)
+
+    def apply_steps(self, steps, count, indices=None):
+        """Run step function over the files in a single pass
+
+        :param steps: yields position, new name and new extension of each change
+        :type steps: Callable[[str, str], Iterable[tuple[int, str, str]]]
+        :param count: number of positions steps can yield
+        :type count: int
+        :param indices: files to run on, defaults to all of them
+        :type indices: Iterable[int]
+        :return: changes made at each position
+        :rtype: list[dict[int, FileInfo]]
+        """
+        names = self.names
+        exts = self.exts
+        changes = [{} for _ in range(count)]
+        for idx in range(len(names)) if indices is None else indices:
+            name = names[idx]
+            ext = exts[idx]
+            changed = False
+            for pos, new_name, new_ext in steps(name, ext):
+                changes[pos][idx] = FileInfo(self.directory(idx), name, ext)
+                name, ext = new_name, new_ext
+                changed = True
+            if changed:
+                names[idx] = name
+                exts[idx] = ext
+        return changes
+
+    def assign(self, updates):
+        """Set the name and extension of files
+
+        :param updates: new name and extension keyed by index
+        :type updates: dict[int, tuple[str, str]]
+        :return: previous name of files that changed
+        :rtype: dict[int, FileInfo]
+        """
+        names = self.names
+        exts = self.exts
+        changes = {}
+        for idx, (name, ext) in updates.items():
+            if name != names[idx] or ext != exts[idx]:
+                changes[idx] = self.info(idx)
+                names[idx] = name
+                exts[idx] = intern(ext)
+        return changes
+
+    def replace(self, find, repl, indices=None):
+        """Find and replace value in filenames"""
+        return self.apply([transforms.replace(find, repl)], indices)[0]
+
+    def change_case(self, cases, indices=None, seed=None):
+        """Change the case of the filenames, each style runs over the whole column"""
+        names = self.names
+        if indices is None:
+            indices = range(len(names))
+            old_names = names
+        else:
+            indices = list(indices)
+            old_names = [names[idx] for idx in indices]
+        new_names = strcase.convert(old_names, cases, seed)
+        dirs, dir_index, exts = self.directories, self.dir_index, self.exts
+        changes = {}
+        for idx, old, new in zip(indices, old_names, new_names):
+            if new != old:
+                changes[idx] = FileInfo(dirs[dir_index[idx]], old, exts[idx])
+                names[idx] = new
+        return changes
+
+    def change_ext(self, new_ext, pattern=None, indices=None):
+        """Change the extension of the files"""
+        return self.apply([transforms.extension(new_ext, pattern)], indices)[0]
+
+    def restore(self, changes):
+        """Set files back to the names in changes"""
+        for idx, info in changes.items():
+            self.names[idx] = info.name
+            self.exts[idx] = info.ext
+
+    def pending(self):
+        """Index, old path and new path of each file with unsaved changes"""
+        cur_names, cur_exts = self.current
+        names, exts = self.names, self.exts
+        for idx, name in enumerate(names):
+            if name != cur_names[idx] or exts[idx] != cur_exts[idx]:
+                yield idx, self.fullname(idx, self.current), self.fullname(idx)
+
+    def mark_saved(self, indices):
+        """Record that files have been renamed on disk"""
+        if self.current is self.original:
+            self.current = (self.original[0].copy(), self.original[1].copy())
+        names, exts = self.current
+        for idx in indices:
+            names[idx] = self.names[idx]
+            exts[idx] = self.exts[idx]
@@ -1,12 +1,12 @@
 """Manage file changes"""
-__all__ = ["FileInfo", "FileHistory"]
+__all__ = ["FileInfo", "FileHistory", "FileBatch"]
 
-import re
 from collections import namedtuple
 from os import path, rename
 from os.path import join
 
-from .strcase import CASE
+from . import strcase, transforms
+from .patterns import compile_pattern
 
 
 class FileInfo(namedtuple("FileInfo", ["directory", "name", "ext"])):
@@ -32,7 +32,11 @@ class FileInfo(namedtuple("FileInfo", ["directory", "name", "ext"])):
 
 
 class FileHistory:
-    """Individual file rename info"""
+    """Individual file rename info
+
+    Past names are kept by the session's
+    :class:`~batchrenamer.oplog.OperationLog`, not by the file.
+    """
 
     def __init__(self, fullname):
         directory = path.dirname(fullname) or "."
@@ -41,63 +45,46 @@ class FileHistory:
         ext = path.splitext(base)[1]
         self.original = FileInfo(directory, name, ext)
         self.current = self.original
-        self.name_list = []
-        self.previous = self.original
-        self.rename = self.previous
+        self.rename = self.original
+
+    @classmethod
+    def from_infos(cls, original, current, rename_):
+        """Create file from names it already has, without parsing a path"""
+        file_ = cls.__new__(cls)
+        file_.original = original
+        file_.current = current
+        file_.rename = rename_
+        return file_
 
     @staticmethod
     def fullname(directory, name, ext):
         """Get full name of file"""
         return join(directory, f"{name}{ext}")
 
+    def apply(self, func):
+        """Run a transform on the name, True if it changed"""
+        info = self.rename
+        name, ext = func(info.name, info.ext)
+        if name == info.name and ext == info.ext:
+            return False
+        self.rename = FileInfo(info.directory, name, ext)
+        return True
+
     def change_case(self, cases):
         """Change the case of the name"""
-        self.name_list.append(self.previous)
-        new_name = self.rename.name
-        for case in cases:
-            func = CASE.get(case, CASE["default"])
-            new_name = func(new_name)
-        self.previous = self.rename
-        self.rename = self.rename._replace(name=new_name)
+        return self.apply(transforms.case(cases))
 
     def change_ext(self, new_ext, pattern=None):
         """Change the extension of a file"""
-        new_ext = new_ext if new_ext[0] == "." else f".{new_ext}"
-        if not pattern or (pattern and re.search(pattern, self.previous.name)):
-            new_info = self.previous._replace(ext=new_ext)
-        else:
-            new_info = self.previous._replace(ext=self.previous.ext)
-        self.name_list.append(self.previous)
-        self.previous = self.rename
-        self.rename = new_info
+        return self.apply(transforms.extension(new_ext, pattern))
 
     def replace(self, find, repl):
         """Find and replace value in filename"""
-        self.name_list.append(self.previous)
-        new_name = re.sub(find, repl, self.rename.name)
-        self.previous = self.rename
-        self.rename = self.rename._replace(name=new_name)
-
-    def noop(self):
-        """Perform noop for when no action should be taken"""
-        self.name_list.append(self.previous)
-        self.previous = self.rename
-
-    def undo(self):
-        """Undo last filename"""
-        length = len(self.name_list)
-        if length:
-            self.rename = self.previous
-            self.previous = self.name_list.pop()
-            return True
-        return False
+        return self.apply(transforms.replace(find, repl))
 
     def reset(self):
         """Reset to inital state"""
-        self.current = self.original
-        self.name_list = []
-        self.previous = self.original
-        self.rename = self.previous
+        self.rename = self.original
 
     def save(self):
         """Save new filename"""
@@ -114,19 +101,129 @@ class FileHistory:
         """Print change from original name to current name"""
         print(self.current.fullname + "\n" + self.rename.fullname + "\n")
 
-    def print_history(self):
-        """Print file changes up"""
+    def print_history(self, past=()):
+        """Print file changes up
+
+        :param past: names the file had before each change, oldest first
+        :type past: list[FileInfo]
+        """
         print(self.current.fullname + "\n" + self.rename.fullname)
-        num = len(self.name_list)
-        if self.previous.name != self.original.name:
-            num += 1
+        num = len(past)
         pad = len(str(num))
         if not num:
             print("   NA\n")
             return
-        for name in self.name_list:
-            print(f"   {str(num).rjust(pad)}  {name.name}")
+        for info in past:
+            print(f"   {str(num).rjust(pad)}  {info.name}{info.ext}")
             num -= 1
-        print(f"   {str(num).rjust(pad)}  {self.previous.name}")
-        num -= 1
         print("~"*20)
+
+
+class FileBatch(list):
+    """List of file histories that are changed together
+
+    Has the same batch methods as :class:`~batchrenamer.columns.FileColumns`
+    so either can back a :class:`~batchrenamer.BatchRenamer`. Changes return
+    the previous :class:`FileInfo` of each file they changed keyed by index.
+    """
+
+    def match(self, pattern, indices=None):
+        """Get indices of files whose name matches pattern, out of indices if given"""
+        search = compile_pattern(pattern).search
+        if indices is None:
+            return [idx for idx, file_ in enumerate(self) if search(file_.rename.name)]
+        return [idx for idx in indices if search(self[idx].rename.name)]
+
+    def iter_names(self, indices=None):
+        """Index, new name and new extension of files, all of them by default"""
+        for idx in range(len(self)) if indices is None else indices:
+            info = self[idx].rename
+            yield idx, info.name, info.ext
+
+    def apply(self, funcs, indices=None):
+        """Run transforms in order over the files in a single pass
+
+        :param funcs: transforms from :mod:`~batchrenamer.transforms`
+        :type funcs: list[Callable[[str, str], tuple[str, str]]]
+        :param indices: files to run on, defaults to all of them
+        :type indices: Iterable[int]
+        :return: changes made by each transform
+        :rtype: list[dict[int, FileInfo]]
+        """
+        return self.apply_steps(transforms.steps(funcs), len(funcs), indices)
+
+    def apply_steps(self, steps, count, indices=None):
+        """Run step function over the files in a single pass
+
+        :param steps: yields position, new name and new extension of each change
+        :type steps: Callable[[str, str], Iterable[tuple[int, str, str]]]
+        :param count: number of positions steps can yield
+        :type count: int
+        :param indices: files to run on, defaults to all of them
+        :type indices: Iterable[int]
+        :return: changes made at each position
+        :rtype: list[dict[int, FileInfo]]
+        """
+        changes = [{} for _ in range(count)]
+        for idx in range(len(self)) if indices is None else indices:
+            file_ = self[idx]
+            info = file_.rename
+            for pos, name, ext in steps(info.name, info.ext):
+                changes[pos][idx] = info
+                info = FileInfo(info.directory, name, ext)
+            file_.rename = info
+        return changes
+
+    def assign(self, updates):
+        """Set the name and extension of files
+
+        :param updates: new name and extension keyed by index
+        :type updates: dict[int, tuple[str, str]]
+        :return: previous name of files that changed
+        :rtype: dict[int, FileInfo]
+        """
+        changes = {}
+        for idx, (name, ext) in updates.items():
+            file_ = self[idx]
+            info = file_.rename
+            if name != info.name or ext != info.ext:
+                changes[idx] = info
+                file_.rename = FileInfo(info.directory, name, ext)
+        return changes
+
+    def replace(self, find, repl, indices=None):
+        """Find and replace value in filenames"""
+        return self.apply([transforms.replace(find, repl)], indices)[0]
+
+    def change_case(self, cases, indices=None, seed=None):
+        """Change the case of the filenames, each style runs over every name at once"""
+        indices = range(len(self)) if indices is None else list(indices)
+        infos = [self[idx].rename for idx in indices]
+        new_names = strcase.convert([info.name for info in infos], cases, seed)
+        changes = {}
+        for idx, info, name in zip(indices, infos, new_names):
+            if name != info.name:
+                changes[idx] = info
+                self[idx].rename = FileInfo(info.directory, name, info.ext)
+        return changes
+
+    def change_ext(self, new_ext, pattern=None, indices=None):
+        """Change the extension of the files"""
+        return self.apply([transforms.extension(new_ext, pattern)], indices)[0]
+
+    def restore(self, changes):
+        """Set files back to the names in changes"""
+        for idx, info in changes.items():
+            self[idx].rename = info
+
+    def pending(self):
+        """Index, old path and new path of each file with unsaved changes"""
+        for idx, file_ in enumerate(self):
+            if file_.current != file_.rename:
+                yield idx, file_.current.fullname, file_.rename.fullname
+
+    def mark_saved(self, indices):
+        """Record that files have been renamed on disk"""
+        for idx in indices:
+            file_ = self[idx]
+            file_.current = file_.rename
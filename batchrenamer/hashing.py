@@ -0,0 +1,158 @@
+"""Hash file contents in parallel, skipping files hashed on a previous run"""
+__all__ = ["ALGORITHMS", "HashCache", "default_cache", "hash_file", "hash_files"]
+
+import json
+from functools import partial
+from os import environ, makedirs, path, stat
+
+ALGORITHMS = ("blake2b", "blake2s", "md5", "sha1", "sha256", "sha512")
+
+
+def default_cache():
+    """Path of the hash cache in the user's cache directory"""
+    base = environ.get("XDG_CACHE_HOME") or path.expanduser("~/.cache")
+    return path.join(base, "brp", "hashes.jsonl")
+
+
+class HashCache:
+    """Digests of files keyed by device, inode, size and modified time
+
+    A file keeps the same key when it's renamed, and gets a new one when it's
+    changed, so digests are reused across renames but never go stale. New
+    digests are appended to the file when saved.
+
+    :param filename: file to read cached digests from and save new ones to
+    :type filename: str
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.digests = {}
+        self._new = []
+        try:
+            fp = open(filename, "r", encoding="utf-8")
+        except FileNotFoundError:
+            return
+        with fp:
+            for line in fp:
+                try:
+                    *key, digest = json.loads(line)
+                except ValueError:
+                    # partly written line from an interrupted save
+                    continue
+                self.digests[tuple(key)] = digest
+
+    @staticmethod
+    def key(result, algorithm):
+        """Cache key of a file from its stat result"""
+        return (
+            result.st_dev,
+            result.st_ino,
+            result.st_size,
+            result.st_mtime_ns,
+            algorithm,
+        )
+
+    def get(self, key):
+        """Cached digest, None if file hasn't been hashed"""
+        return self.digests.get(key)
+
+    def add(self, key, digest):
+        """Cache digest of a file"""
+        self.digests[key] = digest
+        self._new.append((key, digest))
+
+    def save(self):
+        """Append digests added since the last save to the file"""
+        if not self._new:
+            return
+        directory = path.dirname(self.filename)
+        if directory:
+            makedirs(directory, exist_ok=True)
+        with open(self.filename, "a", encoding="utf-8") as fp:
+            for key, digest in self._new:
+                fp.write(json.dumps([*key, digest]) + "\n")
+        self._new.clear()
+
+
+def hash_file(filename, algorithm="sha256", size=1 << 20):
+    """Hex digest of a file, read in chunks into one reused buffer
+
+    :param filename: file to hash
+    :type filename: str
+    :param algorithm: name of the hashlib algorithm to use
+    :type algorithm: str
+    :param size: bytes to read at a time
+    :type size: int
+    :return: hex digest, None if the file can't be read
+    :rtype: str
+    """
+    # pylint: disable=import-outside-toplevel
+    # hashlib and process pools are slow to import, only load them to hash
+    import hashlib
+
+    digest = hashlib.new(algorithm)
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    try:
+        with open(filename, "rb", buffering=0) as fp:
+            while True:
+                read = fp.readinto(buffer)
+                if not read:
+                    break
+                digest.update(view[:read])
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+
+def hash_files(paths, algorithm="sha256", workers=1, cache=None):
+    """Hex digest of each file, hashing the ones not in the cache
+
+    Files are hashed in a pool of processes when there's more than one worker.
+
+    :param paths: files to hash
+    :type paths: list[str]
+    :param algorithm: name of the hashlib algorithm to use
+    :type algorithm: str
+    :param workers: number of processes to hash files with
+    :type workers: int
+    :param cache: digests from previous runs, new digests are added to it
+    :type cache: HashCache
+    :return: digest of each path, None for files that can't be read
+    :rtype: dict[str, str]
+    """
+    digests = {}
+    keys = {}
+    for filename in dict.fromkeys(paths):
+        try:
+            result = stat(filename)
+        except OSError:
+            digests[filename] = None
+            continue
+        key = HashCache.key(result, algorithm)
+        digest = cache.get(key) if cache is not None else None
+        if digest is None:
+            keys[filename] = key
+        else:
+            digests[filename] = digest
+
+    todo = list(keys)
+    func = partial(hash_file, algorithm=algorithm)
+    if workers > 1 and len(todo) > 1:
+        # pylint: disable=import-outside-toplevel
+        from concurrent.futures import ProcessPoolExecutor
+
+        chunksize = max(1, len(todo) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            hashed = pool.map(func, todo, chunksize=chunksize)
+            digests.update(zip(todo, hashed))
+    else:
+        digests.update(zip(todo, map(func, todo)))
+
+    if cache is not None:
+        for filename, key in keys.items():
+            if digests[filename] is not None:
+                cache.add(key, digests[filename])
+        cache.save()
+    return digests
@@ -0,0 +1,93 @@
+"""Time commands and the phases they spend their time in"""
+__all__ = ["PHASES", "CommandStats", "Instruments"]
+
+from collections import deque
+from contextlib import contextmanager
+from time import perf_counter
+
+PHASES = ("parse", "transform", "log", "print", "plan", "io")
+
+
+class CommandStats:
+    """Timing and file counts of one command
+
+    :param command: name of the command
+    :type command: str
+    """
+
+    __slots__ = ("command", "seconds", "touched", "changed", "phases")
+
+    def __init__(self, command):
+        self.command = command
+        self.seconds = 0.0
+        # files the command went over
+        self.touched = 0
+        # indices while running, number of them once finished
+        self.changed = set()
+        self.phases = dict.fromkeys(PHASES, 0.0)
+
+    def as_dict(self):
+        """Stats as plain values for writing out as json"""
+        return {
+            "command": self.command,
+            "seconds": self.seconds,
+            "touched": self.touched,
+            "changed": self.changed,
+            "phases": self.phases,
+        }
+
+
+class Instruments:
+    """Stats of the most recent commands
+
+    Commands run inside other commands, like the ones an automate script
+    runs, get their own stats and the phases they run are only added to them.
+
+    :param size: most commands to keep stats for
+    :type size: int
+    """
+
+    def __init__(self, size=1000):
+        self.records = deque(maxlen=size)
+        self._running = []
+
+    @contextmanager
+    def command(self, name):
+        """Time a command, yielding its stats so the name can be changed"""
+        stats = CommandStats(name)
+        self._running.append(stats)
+        start = perf_counter()
+        try:
+            yield stats
+        finally:
+            stats.seconds = perf_counter() - start
+            stats.changed = len(stats.changed)
+            self._running.pop()
+            self.records.append(stats)
+
+    @contextmanager
+    def phase(self, name):
+        """Add time spent in the block to a phase of the running command"""
+        if not self._running:
+            yield
+            return
+        stats = self._running[-1]
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            stats.phases[name] += perf_counter() - start
+
+    def touch(self, count):
+        """Count files the running command went over"""
+        if self._running:
+            self._running[-1].touched += count
+
+    def change(self, indices):
+        """Note files the running command changed"""
+        if self._running:
+            self._running[-1].changed.update(indices)
+
+    def clear(self):
+        """Forget stats of finished commands"""
+        self.records.clear()
@@ -0,0 +1,183 @@
+"""Journal renames so an interrupted save can be resumed or rolled back"""
+__all__ = ["Journal", "read_journal", "resume_journal", "rollback_journal"]
+
+import json
+from collections import namedtuple
+from os import fsync, getcwd, path, rename
+
+from .saver import RenameFailure, SaveReport
+
+JournalEntry = namedtuple("JournalEntry", ["id", "old", "new", "state"])
+
+BEGIN = "B"
+DONE = "D"
+FAILED = "F"
+UNDONE = "U"
+CWD = "C"
+
+
+class Journal:
+    """Append only record of renames
+
+    Each rename is written before it happens and marked after it finishes.
+    Entries about to happen are synced to disk before any of them run,
+    finished marks are only flushed since the state of an unfinished entry
+    can be worked out by looking at the two paths.
+
+    :param filename: journal to append to
+    :type filename: str
+    """
+
+    def __init__(self, filename):
+        # pylint: disable=import-outside-toplevel
+        # only saves with a journal need threading, don't load it at startup
+        from threading import Lock
+
+        self.filename = filename
+        self._lock = Lock()
+        self._next_id = 0
+        if path.exists(filename):
+            self._next_id = max(read_journal(filename), default=-1) + 1
+        self._fp = open(filename, "a", encoding="utf-8")
+        self._write([CWD, getcwd()])
+        self._sync()
+
+    def _write(self, record):
+        self._fp.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def _sync(self):
+        self._fp.flush()
+        fsync(self._fp.fileno())
+
+    def begin(self, steps):
+        """Record renames that are about to happen
+
+        :param steps: old and new path of each rename
+        :type steps: Iterable[RenameStep]
+        :return: journal id of each step
+        :rtype: list[int]
+        """
+        with self._lock:
+            ids = []
+            for step in steps:
+                self._write([BEGIN, self._next_id, step.old, step.new])
+                ids.append(self._next_id)
+                self._next_id += 1
+            self._sync()
+        return ids
+
+    def finish(self, done=(), failed=()):
+        """Record renames that happened or raised an error"""
+        with self._lock:
+            for entry_id in done:
+                self._write([DONE, entry_id])
+            for entry_id in failed:
+                self._write([FAILED, entry_id])
+            self._fp.flush()
+
+    def undone(self, entry_id):
+        """Record rename that was rolled back"""
+        with self._lock:
+            self._write([UNDONE, entry_id])
+
+    def close(self):
+        """Sync and close the journal"""
+        with self._lock:
+            if not self._fp.closed:
+                self._sync()
+                self._fp.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+
+def read_journal(filename):
+    """Read journal entries in the order they were started
+
+    Relative paths are resolved against the directory the save was run from.
+
+    :return: entries keyed by journal id
+    :rtype: dict[int, JournalEntry]
+    """
+    entries = {}
+    cwd = ""
+    with open(filename, "r", encoding="utf-8") as fp:
+        for line in fp:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # last line may be cut off if the save was killed mid write
+                continue
+            kind = record[0]
+            if kind == CWD:
+                cwd = record[1]
+            elif kind == BEGIN:
+                _, entry_id, old, new = record
+                entries[entry_id] = JournalEntry(
+                    entry_id, path.join(cwd, old), path.join(cwd, new), BEGIN
+                )
+            elif record[1] in entries:
+                entries[record[1]] = entries[record[1]]._replace(state=kind)
+    return entries
+
+
+def _moved(entry):
+    """Check if an unfinished entry was renamed before the journal was marked"""
+    return path.lexists(entry.new) and not path.lexists(entry.old)
+
+
+def resume_journal(filename):
+    """Finish renames that were started but never marked done
+
+    :return: entries renamed and the ones that couldn't be
+    :rtype: SaveReport
+    """
+    report = SaveReport([], [])
+    entries = read_journal(filename)
+    with Journal(filename) as journal:
+        for entry in entries.values():
+            if entry.state != BEGIN:
+                continue
+            if not _moved(entry):
+                try:
+                    if path.lexists(entry.new):
+                        raise FileExistsError(f"{entry.new} already exists")
+                    rename(entry.old, entry.new)
+                except OSError as e:
+                    journal.finish(failed=[entry.id])
+                    report.failed.append(
+                        RenameFailure(entry.id, entry.old, entry.new, e)
+                    )
+                    continue
+            journal.finish(done=[entry.id])
+            report.renamed.append(entry.id)
+    return report
+
+
+def rollback_journal(filename):
+    """Move every renamed file in the journal back to its old name, newest first
+
+    :return: entries moved back and the ones that couldn't be
+    :rtype: SaveReport
+    """
+    report = SaveReport([], [])
+    entries = read_journal(filename)
+    with Journal(filename) as journal:
+        for entry in reversed(list(entries.values())):
+            if entry.state not in (DONE, BEGIN):
+                continue
+            if entry.state == BEGIN and not _moved(entry):
+                continue
+            try:
+                if path.lexists(entry.old):
+                    raise FileExistsError(f"{entry.old} already exists")
+                rename(entry.new, entry.old)
+            except OSError as e:
+                report.failed.append(RenameFailure(entry.id, entry.new, entry.old, e))
+                continue
+            journal.undone(entry.id)
+            report.renamed.append(entry.id)
+    return report
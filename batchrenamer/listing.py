@@ -0,0 +1,136 @@
+"""List each directory once to check files exist and names are free"""
+__all__ = ["DirectoryListings", "LoadProblem", "check_files"]
+
+from collections import namedtuple
+from os import path, scandir, stat
+
+LoadProblem = namedtuple("LoadProblem", ["filename", "reason"])
+
+
+class Listing:
+    """Entries of a directory and when it was last changed
+
+    :param mtime: modified time of the directory when it was listed
+    :type mtime: int
+    :param entries: whether each entry is a directory, keyed by name
+    :type entries: dict[str, bool]
+    """
+
+    __slots__ = ("mtime", "entries", "_folded")
+
+    def __init__(self, mtime, entries):
+        self.mtime = mtime
+        self.entries = entries
+        self._folded = None
+
+    def folded(self):
+        """Case folded names of the entries, only worked out when first needed"""
+        if self._folded is None:
+            self._folded = frozenset(name.casefold() for name in self.entries)
+        return self._folded
+
+
+def _list(directory):
+    """Listing of directory, None if it can't be read"""
+    try:
+        mtime = stat(directory).st_mtime_ns
+        entries = {}
+        with scandir(directory) as found:
+            for entry in found:
+                try:
+                    entries[entry.name] = entry.is_dir()
+                except OSError:
+                    entries[entry.name] = False
+    except OSError:
+        return None
+    return Listing(mtime, entries)
+
+
+def _mtime(directory):
+    try:
+        return stat(directory).st_mtime_ns
+    except OSError:
+        return None
+
+
+class DirectoryListings:
+    """Listings of directories read in threads, kept until the directory changes
+
+    :param workers: number of threads to list directories with
+    :type workers: int
+    """
+
+    def __init__(self, workers=8):
+        self.workers = workers
+        self.listings = {}
+
+    def _map(self, func, directories):
+        if len(directories) > 1 and self.workers > 1:
+            # pylint: disable=import-outside-toplevel
+            from concurrent.futures import ThreadPoolExecutor
+
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                return list(pool.map(func, directories))
+        return list(map(func, directories))
+
+    def load(self, directories):
+        """List directories that haven't been listed yet
+
+        :param directories: directories to list, repeats are only listed once
+        :type directories: Iterable[str]
+        :return: listing of every directory, None for ones that can't be read
+        :rtype: dict[str, Listing]
+        """
+        missing = [d for d in dict.fromkeys(directories) if d not in self.listings]
+        self.listings.update(zip(missing, self._map(_list, missing)))
+        return self.listings
+
+    def refresh(self):
+        """Forget listings of directories that changed since they were listed"""
+        directories = list(self.listings)
+        for directory, mtime in zip(directories, self._map(_mtime, directories)):
+            listing = self.listings[directory]
+            if mtime is None or listing is None or listing.mtime != mtime:
+                del self.listings[directory]
+
+    def exists(self, filename):
+        """Check if a path is taken, the same as :func:`os.path.lexists`"""
+        directory, name = path.split(filename)
+        directory = directory or "."
+        listing = self.load([directory])[directory]
+        if listing is None:
+            return path.lexists(filename)
+        if name in listing.entries:
+            return True
+        if name.casefold() in listing.folded():
+            # could be the same file on a case insensitive filesystem
+            return path.lexists(filename)
+        return False
+
+    def clear(self):
+        """Forget every listing"""
+        self.listings.clear()
+
+
+def check_files(filenames, listings):
+    """Files that don't exist or aren't files, listing each directory once
+
+    :param filenames: paths of the files to check
+    :type filenames: list[str]
+    :param listings: listings to read directories thru, new ones are kept
+    :type listings: DirectoryListings
+    :return: problem with each file that has one
+    :rtype: list[LoadProblem]
+    """
+    split = [(filename, *path.split(filename)) for filename in filenames]
+    found = listings.load(directory or "." for _, directory, _ in split)
+    problems = []
+    for filename, directory, name in split:
+        listing = found[directory or "."]
+        if listing is None:
+            problems.append(LoadProblem(filename, "directory can't be read"))
+        elif name not in listing.entries:
+            problems.append(LoadProblem(filename, "no such file"))
+        elif listing.entries[name]:
+            problems.append(LoadProblem(filename, "is a directory"))
+    return problems
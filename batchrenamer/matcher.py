@@ -0,0 +1,81 @@
+"""Match a name against many patterns in one scan"""
+__all__ = ["PatternIndex"]
+
+import re
+
+from .patterns import compile_pattern
+
+REGEX_CHARS = frozenset(".^$*+?{}[]\\|()")
+
+
+class PatternIndex:
+    """Index of regex patterns that finds every pattern matching a name
+
+    Patterns without any regex special characters are looked up by hashing
+    each substring of the name with the same length as one of the patterns.
+    The rest are combined into a few large regexes where each pattern is an
+    optional lookahead with a named group, so one search finds all of them.
+    Patterns that can't be combined (like ones with backreferences) are
+    searched on their own.
+
+    :param patterns: regex patterns to index
+    :type patterns: list[str]
+    :param chunksize: most patterns to combine into one regex
+    :type chunksize: int
+    """
+
+    def __init__(self, patterns, chunksize=500):
+        # length -> literal -> indices of patterns
+        self.literals = {}
+        self.combined = []
+        self.single = []
+        regexes = []
+        for idx, pattern in enumerate(patterns):
+            if REGEX_CHARS.isdisjoint(pattern):
+                by_len = self.literals.setdefault(len(pattern), {})
+                by_len.setdefault(pattern, []).append(idx)
+            else:
+                regexes.append((idx, pattern))
+        for start in range(0, len(regexes), chunksize):
+            self._combine(regexes[start : start + chunksize])
+
+    def _combine(self, chunk):
+        """Compile chunk of patterns into one regex, on their own if that fails"""
+        parts = []
+        groups = []
+        for idx, pattern in chunk:
+            compiled = compile_pattern(pattern)
+            if compiled.groups or compiled.flags & ~re.UNICODE:
+                # group numbers and inline flags don't survive being combined
+                self.single.append((idx, compiled.search))
+                continue
+            parts.append(f"(?=[\\s\\S]*?(?P<p{idx}>{pattern}))?")
+            groups.append((f"p{idx}", idx))
+        if not parts:
+            return
+        try:
+            combined = re.compile("".join(parts))
+        except re.error:
+            patterns = dict(chunk)
+            for _, idx in groups:
+                self.single.append((idx, compile_pattern(patterns[idx]).search))
+            return
+        self.combined.append((combined.match, groups))
+
+    def matches(self, name):
+        """Indices of every pattern that matches name, in order"""
+        found = []
+        size = len(name)
+        for length, literals in self.literals.items():
+            if length == 0:
+                found.extend(literals[""])
+                continue
+            for start in range(size - length + 1):
+                hits = literals.get(name[start : start + length])
+                if hits:
+                    found.extend(hits)
+        for match, groups in self.combined:
+            result = match(name)
+            found.extend(idx for group, idx in groups if result[group] is not None)
+        found.extend(idx for idx, search in self.single if search(name))
+        return sorted(set(found))
@@ -0,0 +1,222 @@
+"""Read file metadata for name templates, once per file per session"""
+__all__ = ["EXIF_TAGS", "Metadata", "read_exif", "template_fields"]
+
+from os import stat
+from string import Formatter
+from struct import error as StructError
+from struct import unpack_from
+
+STAT_FIELDS = frozenset(("size", "mtime", "ctime", "atime"))
+FIELDS = frozenset(("n", "name", "ext", "exif")) | STAT_FIELDS
+
+# most exif headers fit in the first 64KiB, leave room for markers before it
+HEADER_SIZE = 1 << 17
+
+EXIF_TAGS = {
+    0x010F: "Make",
+    0x0110: "Model",
+    0x0112: "Orientation",
+    0x0131: "Software",
+    0x0132: "DateTime",
+    0x013B: "Artist",
+    0x8298: "Copyright",
+    0x829A: "ExposureTime",
+    0x829D: "FNumber",
+    0x8827: "ISOSpeedRatings",
+    0x9003: "DateTimeOriginal",
+    0x9004: "DateTimeDigitized",
+    0x920A: "FocalLength",
+    0xA002: "PixelXDimension",
+    0xA003: "PixelYDimension",
+    0xA434: "LensModel",
+}
+EXIF_IFD = 0x8769
+# bytes per value of each tiff field type
+TYPE_SIZES = {1: 1, 2: 1, 3: 2, 4: 4, 5: 8, 7: 1, 9: 4, 10: 8}
+
+
+class ExifTags(dict):
+    """Exif tags by name, read as attributes so templates can use {exif.Make}
+
+    Tags the file doesn't have are empty strings.
+    """
+
+    __slots__ = ()
+
+    def __getattr__(self, name):
+        return self.get(name, "")
+
+
+def _tag_value(tiff, endian, kind, count, offset):
+    """Value of one ifd entry, the first one if there are many"""
+    size = TYPE_SIZES.get(kind)
+    if size is None:
+        return None
+    if size * count > 4:
+        (offset,) = unpack_from(f"{endian}I", tiff, offset)
+    if kind == 2:
+        return tiff[offset : offset + count].split(b"\0", 1)[0].decode(errors="replace")
+    if kind in (5, 10):
+        num, den = unpack_from(f"{endian}{'II' if kind == 5 else 'ii'}", tiff, offset)
+        return num / den if den else 0
+    fmt = {1: "B", 3: "H", 4: "I", 7: "B", 9: "i"}[kind]
+    return unpack_from(f"{endian}{fmt}", tiff, offset)[0]
+
+
+def _read_ifd(tiff, endian, offset, tags):
+    """Add tags in the ifd at offset, following the pointer to the exif ifd"""
+    (count,) = unpack_from(f"{endian}H", tiff, offset)
+    for entry in range(offset + 2, offset + 2 + count * 12, 12):
+        tag, kind, number = unpack_from(f"{endian}HHI", tiff, entry)
+        if tag == EXIF_IFD:
+            (sub,) = unpack_from(f"{endian}I", tiff, entry + 8)
+            if sub != offset:
+                _read_ifd(tiff, endian, sub, tags)
+        elif tag in EXIF_TAGS:
+            value = _tag_value(tiff, endian, kind, number, entry + 8)
+            if value is not None:
+                tags[EXIF_TAGS[tag]] = value
+
+
+def _find_tiff(data):
+    """Tiff block holding the exif data of a jpeg or tiff header"""
+    if data[:4] in (b"II*\0", b"MM\0*"):
+        return data
+    if data[:2] != b"\xff\xd8":
+        return None
+    pos = 2
+    while pos + 4 <= len(data) and data[pos] == 0xFF:
+        marker = data[pos + 1]
+        (size,) = unpack_from(">H", data, pos + 2)
+        if marker == 0xE1 and data[pos + 4 : pos + 10] == b"Exif\0\0":
+            return data[pos + 10 : pos + 2 + size]
+        if marker == 0xDA:
+            # image data starts, no more headers
+            break
+        pos += 2 + size
+    return None
+
+
+def read_exif(filename):
+    """Exif tags in the header of a jpeg or tiff file
+
+    Only the tags in :data:`EXIF_TAGS` are read. Files that can't be read or
+    have no exif data get no tags.
+
+    :param filename: file to read
+    :type filename: str
+    :rtype: ExifTags
+    """
+    tags = ExifTags()
+    try:
+        with open(filename, "rb") as fp:
+            tiff = _find_tiff(fp.read(HEADER_SIZE))
+        if tiff:
+            endian = "<" if tiff[:2] == b"II" else ">"
+            (offset,) = unpack_from(f"{endian}I", tiff, 4)
+            _read_ifd(tiff, endian, offset, tags)
+    except (OSError, StructError, ValueError, KeyError, RecursionError):
+        pass
+    return tags
+
+
+def _stat(filename):
+    try:
+        return stat(filename)
+    except OSError:
+        return None
+
+
+def template_fields(template):
+    """Names of the fields a template uses
+
+    :raises ValueError: template is malformed or uses an unknown field
+    """
+    fields = set()
+    for _, field, _, _ in Formatter().parse(template):
+        if field is None:
+            continue
+        name = field.split(".", 1)[0].split("[", 1)[0]
+        if name not in FIELDS:
+            raise ValueError(f"unknown field {name!r}, use one of {sorted(FIELDS)}")
+        fields.add(name)
+    return fields
+
+
+class Metadata:
+    """Stat results and exif tags of files, read in threads and kept for reuse
+
+    Only the files asked for are read, and each one only the first time.
+
+    :param workers: number of threads to read files with
+    :type workers: int
+    """
+
+    def __init__(self, workers=8):
+        self.workers = workers
+        self.stats = {}
+        self.exifs = {}
+
+    def _fetch(self, cache, func, paths):
+        missing = [path for path in dict.fromkeys(paths) if path not in cache]
+        if len(missing) > 1 and self.workers > 1:
+            # pylint: disable=import-outside-toplevel
+            from concurrent.futures import ThreadPoolExecutor
+
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                cache.update(zip(missing, pool.map(func, missing)))
+        else:
+            cache.update(zip(missing, map(func, missing)))
+        return cache
+
+    def stat(self, paths):
+        """Stat result of each path, None for files that can't be read
+
+        :rtype: dict[str, os.stat_result]
+        """
+        return self._fetch(self.stats, _stat, paths)
+
+    def exif(self, paths):
+        """Exif tags of each path
+
+        :rtype: dict[str, ExifTags]
+        """
+        return self._fetch(self.exifs, read_exif, paths)
+
+    def fields(self, paths, names):
+        """Template values from metadata for each path
+
+        :param paths: files to get values for
+        :type paths: list[str]
+        :param names: fields the template uses
+        :type names: set[str]
+        :return: values keyed by path, None for files that can't be stat'ed
+            when the template needs it
+        :rtype: dict[str, dict]
+        """
+        values = {path: {} for path in paths}
+        if names & STAT_FIELDS:
+            # pylint: disable=import-outside-toplevel
+            from datetime import datetime
+
+            stats = self.stat(paths)
+            for path, fields in values.items():
+                result = stats[path]
+                if result is None:
+                    values[path] = None
+                    continue
+                fields["size"] = result.st_size
+                fields["mtime"] = datetime.fromtimestamp(result.st_mtime)
+                fields["ctime"] = datetime.fromtimestamp(result.st_ctime)
+                fields["atime"] = datetime.fromtimestamp(result.st_atime)
+        if "exif" in names:
+            exifs = self.exif(paths)
+            for path, fields in values.items():
+                if fields is not None:
+                    fields["exif"] = exifs[path]
+        return values
+
+    def clear(self):
+        """Forget everything read so far"""
+        self.stats.clear()
+        self.exifs.clear()
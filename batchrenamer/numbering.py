@@ -0,0 +1,101 @@
+"""Number files in sorted order with a name template"""
+__all__ = ["SORT_KEYS", "number_files"]
+
+from .metadata import STAT_FIELDS, Metadata, template_fields
+
+SORT_KEYS = ("none", "name", "mtime", "size")
+
+
+def number_files(
+    files,
+    template,
+    start=1,
+    step=1,
+    key="none",
+    per_directory=False,
+    reverse=False,
+    indices=None,
+    metadata=None,
+):
+    """New name of each file from template and its place in the sorted files
+
+    Files are sorted once, by directory first if numbering restarts in each
+    directory, and then numbered in that order.
+
+    :param files: files to number
+    :type files: FileBatch | FileColumns
+    :param template: format string for the new name, ``{n}`` is the number,
+        ``{name}`` and ``{ext}`` are the name and extension, ``{size}`` and
+        ``{mtime}`` come from stat and ``{exif.Tag}`` from the exif header,
+        e.g. ``{mtime:%Y%m%d}_{n:03d}``
+    :type template: str
+    :param start: number of the first file
+    :type start: int
+    :param step: amount to add to the number for each file
+    :type step: int
+    :param key: what to sort files by, one of :data:`SORT_KEYS`
+    :type key: str
+    :param per_directory: start numbering over in each directory
+    :type per_directory: bool
+    :param reverse: sort in descending order
+    :type reverse: bool
+    :param indices: files to number, defaults to all of them
+    :type indices: Iterable[int]
+    :param metadata: where to read file metadata from, so it's only read once
+    :type metadata: Metadata
+    :return: new name and extension keyed by index, files missing metadata the
+        template needs are left out
+    :rtype: dict[int, tuple[str, str]]
+    :raises ValueError: template is malformed or has unknown fields
+    """
+    if indices is None:
+        indices = range(len(files))
+        infos = [file_.rename for file_ in files]
+    else:
+        indices = list(indices)
+        infos = {idx: files[idx].rename for idx in indices}
+    fields = template_fields(template)
+    metadata = metadata or Metadata()
+    if fields & (STAT_FIELDS | {"exif"}) or key in ("mtime", "size"):
+        paths = {idx: files[idx].current.fullname for idx in indices}
+        values = metadata.fields(list(paths.values()), fields)
+    else:
+        paths = values = None
+
+    if key == "name":
+        keys = {idx: infos[idx].name + infos[idx].ext for idx in indices}
+    elif key in ("mtime", "size"):
+        stats = metadata.stat(paths.values())
+        attr = f"st_{key}"
+        keys = {idx: getattr(stats[paths[idx]], attr, 0) for idx in indices}
+    else:
+        keys = None
+    if per_directory:
+        if keys is None:
+            sort_key = lambda idx: (infos[idx].directory, idx)
+        else:
+            sort_key = lambda idx: (infos[idx].directory, keys[idx])
+        order = sorted(indices, key=sort_key, reverse=reverse)
+    elif keys is None:
+        order = sorted(indices, reverse=reverse)
+    else:
+        order = sorted(indices, key=keys.__getitem__, reverse=reverse)
+
+    updates = {}
+    number = start
+    directory = None
+    for idx in order:
+        info = infos[idx]
+        extra = values[paths[idx]] if values else {}
+        if extra is None:
+            continue
+        if per_directory and info.directory != directory:
+            directory = info.directory
+            number = start
+        try:
+            name = template.format(n=number, name=info.name, ext=info.ext, **extra)
+        except (ValueError, TypeError, AttributeError, IndexError, KeyError) as e:
+            raise ValueError(f"{template!r}: {e}") from e
+        updates[idx] = (name, info.ext)
+        number += step
+    return updates
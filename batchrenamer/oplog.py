@@ -0,0 +1,104 @@
+"""Session history of changes made to the files"""
+__all__ = ["Operation", "OperationLog"]
+
+from collections import namedtuple
+
+
+class Operation(namedtuple("Operation", ["label", "changes"])):
+    """Single command applied to the files
+
+    :param label: name of the command that was run
+    :type label: str
+    :param changes: name each changed file had before the command, keyed by index
+    :type changes: dict[int, FileInfo]
+    """
+
+    __slots__ = ()
+
+
+class OperationLog:
+    """Ordered log of operations, only files that changed are recorded
+
+    Undoing and rewinding only go over the files the operations changed, never
+    the whole batch. The operations each file was changed by are indexed the
+    first time a file's past is asked for, then kept up to date.
+    """
+
+    def __init__(self):
+        self.operations = []
+        # positions of the operations that changed each file, built on demand
+        self._touched = None
+
+    def __len__(self):
+        return len(self.operations)
+
+    def __bool__(self):
+        return bool(self.operations)
+
+    def record(self, label, changes):
+        """Add operation to the log"""
+        operation = Operation(label, changes)
+        if self._touched is not None:
+            position = len(self.operations)
+            for index in changes:
+                self._touched.setdefault(index, []).append(position)
+        self.operations.append(operation)
+        return operation
+
+    def pop(self):
+        """Remove last operation, None if the log is empty"""
+        if not self.operations:
+            return None
+        operation = self.operations.pop()
+        if self._touched is not None:
+            for index in operation.changes:
+                positions = self._touched[index]
+                positions.pop()
+                if not positions:
+                    del self._touched[index]
+        return operation
+
+    def unwind(self, count):
+        """Remove the last count operations, merging what they changed
+
+        :param count: most operations to remove
+        :type count: int
+        :return: name each file had before the first removed operation changed
+            it, and the number of operations removed
+        :rtype: tuple[dict[int, FileInfo], int]
+        """
+        changes = {}
+        removed = 0
+        while removed < count:
+            operation = self.pop()
+            if operation is None:
+                break
+            changes.update(operation.changes)
+            removed += 1
+        return changes, removed
+
+    def rewind(self):
+        """Empty the log and get the original name of every file that changed"""
+        changes = {}
+        for operation in reversed(self.operations):
+            changes.update(operation.changes)
+        self.operations = []
+        self._touched = None
+        return changes
+
+    def _index(self):
+        touched = {}
+        for position, operation in enumerate(self.operations):
+            for index in operation.changes:
+                touched.setdefault(index, []).append(position)
+        return touched
+
+    def past(self, index):
+        """Names a file had before each change made to it, oldest first"""
+        if self._touched is None:
+            self._touched = self._index()
+        operations = self.operations
+        return [
+            operations[position].changes[index]
+            for position in self._touched.get(index, ())
+        ]
@@ -0,0 +1,70 @@
+"""Format and page file changes for the terminal"""
+__all__ = ["TargetIndex", "format_changes", "page"]
+
+import sys
+from collections import Counter
+
+
+class TargetIndex:
+    """Number of files going to each new name, updated as files change
+
+    :param files: files to index
+    :type files: FileBatch | FileColumns
+    """
+
+    def __init__(self, files):
+        self.counts = Counter(file_.rename.fullname for file_ in files)
+
+    def update(self, files, changes):
+        """Move changed files from their previous name to their new one"""
+        counts = self.counts
+        for idx, before in changes.items():
+            old = before.fullname
+            if counts[old] > 1:
+                counts[old] -= 1
+            else:
+                # never below zero, even if changes has a name that wasn't counted
+                counts.pop(old, None)
+            counts[files[idx].rename.fullname] += 1
+
+    def collisions(self, files, indices):
+        """Number of files in indices going to the same name as another file"""
+        counts = self.counts
+        return sum(1 for idx in indices if counts[files[idx].rename.fullname] > 1)
+
+
+def format_changes(files, indices=None, limit=None):
+    """Old and new name of files, one blank line between each
+
+    :param files: files to show
+    :type files: FileBatch | FileColumns
+    :param indices: files to show, defaults to all of them
+    :type indices: Iterable[int]
+    :param limit: most files to show, defaults to all of them
+    :type limit: int
+    :return: text to print and number of files left out
+    :rtype: tuple[str, int]
+    """
+    indices = range(len(files)) if indices is None else sorted(indices)
+    shown = indices[:limit] if limit is not None else indices
+    lines = []
+    for idx in shown:
+        file_ = files[idx]
+        lines.append(f"{file_.current.fullname}\n{file_.rename.fullname}\n\n")
+    return "".join(lines), len(indices) - len(shown)
+
+
+def page(text, interactive=True):
+    """Write text in one go, thru a pager if it's longer than the terminal"""
+    # pylint: disable=import-outside-toplevel
+    # shutil and pydoc are slow to import and only needed on a terminal
+    if interactive and sys.stdout.isatty():
+        from shutil import get_terminal_size
+
+        if text.count("\n") >= get_terminal_size().lines:
+            from pydoc import pager
+
+            pager(text)
+            return
+    sys.stdout.write(text)
+    sys.stdout.flush()
@@ -3,26 +3,38 @@ __all__ = ["generate_parser"]
 
 import re
 from argparse import ArgumentError, ArgumentParser, RawDescriptionHelpFormatter
-from dataclasses import dataclass
+from functools import cached_property
 from shlex import split
 
+from .hashing import ALGORITHMS
+from .numbering import SORT_KEYS
+
 
-@dataclass
 class SubparserHelp:
-    """Clean help messags for the subparsers"""
+    """Clean help messags for the subparsers, only formatted when first used"""
 
-    def __init__(self, cmds, usage, help_):
-        usage = usage.replace("usage: ", "").strip()
+    def __init__(self, cmds, parser):
+        self.parser = parser
+        self.names = cmds
+        self.cmds = {}
+        for cmd in cmds:
+            self.cmds[cmd] = self
+
+    @cached_property
+    def usage(self):
+        """Usage line with the aliases of the command"""
+        cmds = self.names
+        usage = self.parser.format_usage().replace("usage: ", "").strip()
         alts = f"{cmds[0]} ({', '.join(cmds[1:])})" if cmds[1:] else cmds[0]
-        self.usage = re.sub(r"^" + cmds[0], alts, usage)
+        return re.sub(r"^" + cmds[0], alts, usage)
 
+    @cached_property
+    def help(self):
+        """Usage followed by the description and arguments"""
+        help_ = self.parser.format_help()
         args = [f"   {l}" for l in help_.splitlines()[1:] if l.strip()]
         msg = "\n".join(args)
-        self.help = f"{self.usage}\n{msg}\n"
-
-        self.cmds = {}
-        for cmd in cmds:
-            self.cmds[cmd] = self
+        return f"{self.usage}\n{msg}\n"
 
 
 class ShlexArgumentParser(ArgumentParser):
@@ -45,15 +57,25 @@ CONFIRM_KWARGS = {
     "help": "automatically confirm action",
 }
 
+WORKERS_ARGS = ["-j", "--workers"]
+WORKERS_KWARGS = {
+    "dest": "workers",
+    "type": int,
+    "default": None,
+    "help": "number of threads to rename files with",
+}
+
 
 def _parser(cmds, subparsers):
-    return subparsers.add_parser(
+    parser = subparsers.add_parser(
         cmds[0],
         aliases=cmds[1:],
         prog=cmds[0],
         add_help=False,
         exit_on_error=False,
     )
+    parser.set_defaults(command=cmds[0])
+    return parser
 
 
 def _help_parser(cmds, subparsers, renamer):
@@ -70,7 +92,7 @@ def _help_parser(cmds, subparsers, renamer):
         default=False,
         help="display just the usage messages",
     )
-    return SubparserHelp(cmds, _help.format_usage(), _help.format_help())
+    return SubparserHelp(cmds, _help)
 
 
 def _quit_parser(cmds, subparsers, renamer):
@@ -79,7 +101,69 @@ def _quit_parser(cmds, subparsers, renamer):
     _quit.description = "quit program, don't apply unsaved changes"
     _quit.set_defaults(func=renamer.quit_app)
     _quit.add_argument(*CONFIRM_ARGS, **CONFIRM_KWARGS)
-    return SubparserHelp(cmds, _quit.format_usage(), _quit.format_help())
+    return SubparserHelp(cmds, _quit)
+
+
+def _session_parser(cmds, subparsers, func, description):
+    """Save and Load Session Commands"""
+    _session = _parser(cmds, subparsers)
+    _session.description = description
+    _session.set_defaults(func=func)
+    _session.add_argument(
+        "filename",
+        nargs="?",
+        help="session file, defaults to the one given with --session",
+    )
+    return SubparserHelp(cmds, _session)
+
+
+def _select_parser(cmds, subparsers, func, description):
+    """Select and Filter Commands"""
+    _select = _parser(cmds, subparsers)
+    _select.description = description
+    _select.set_defaults(func=func)
+    _select.add_argument(
+        "name",
+        nargs="?",
+        help="name of the selection, all is every file",
+    )
+    _select.add_argument(
+        "-g",
+        "--glob",
+        dest="globs",
+        action="append",
+        default=[],
+        help="files whose name and extension match shell pattern",
+        metavar="PATTERN",
+    )
+    _select.add_argument(
+        "-m",
+        "--match",
+        dest="regexes",
+        action="append",
+        default=[],
+        help="files whose name matches regex",
+        metavar="PATTERN",
+    )
+    _select.add_argument(
+        "-e",
+        "--ext",
+        dest="exts",
+        nargs="+",
+        default=[],
+        help="files with any of the extensions",
+        metavar="EXT",
+    )
+    _select.add_argument(
+        "-d",
+        "--dir",
+        dest="dirs",
+        nargs="+",
+        default=[],
+        help="files directly in any of the directories",
+        metavar="DIR",
+    )
+    return SubparserHelp(cmds, _select)
 
 
 def _automate_parser(cmds, subparsers, renamer):
@@ -88,7 +172,7 @@ def _automate_parser(cmds, subparsers, renamer):
     _automate.description = "automate commands in order to speed up repetative tasks"
     _automate.set_defaults(func=renamer.automate_manual)
     _automate.add_argument("filenames", nargs="*")
-    return SubparserHelp(cmds, _automate.format_usage(), _automate.format_help())
+    return SubparserHelp(cmds, _automate)
 
 
 def _case_parser(cmds, subparsers, renamer):
@@ -96,14 +180,21 @@ def _case_parser(cmds, subparsers, renamer):
     _case = _parser(cmds, subparsers)
     _case.exit_on_error = False
     _case.description = "change the case (title, upper, lower) of files"
-    _case.set_defaults(func=renamer.change_case)
+    _case.set_defaults(func=renamer.change_case, transform=renamer.case_transform)
     _case.add_argument(
         "styles",
         type=str,
         nargs="*",
         help="type of case style (lower, upper, title, camel, kebab, ect) to switch to",
     )
-    return SubparserHelp(cmds, _case.format_usage(), _case.format_help())
+    _case.add_argument(
+        "--seed",
+        dest="seed",
+        type=int,
+        default=None,
+        help="seed for sponge case so the same names get the same case each run",
+    )
+    return SubparserHelp(cmds, _case)
 
 
 def _append_parser(cmds, subparsers, renamer):
@@ -113,14 +204,20 @@ def _append_parser(cmds, subparsers, renamer):
         "pattern and value to append to each file that matches,"
         "can be automated with a file"
     )
-    _append.set_defaults(func=renamer.append)
+    _append.set_defaults(
+        func=renamer.append,
+        transform=renamer.pend_transform,
+        side=r"$",
+        value="{pad}{repl}",
+    )
     _append.add_argument(
         "find",
         nargs="?",
         help="regex pattern to match against",
     )
     _append.add_argument(
-        "append",
+        "replace",
+        metavar="append",
         nargs="?",
         help="value to append to filename",
     )
@@ -138,7 +235,161 @@ def _append_parser(cmds, subparsers, renamer):
         default=" ",
         help="string to insert between the end of the filename and the value being appended",
     )
-    return SubparserHelp(cmds, _append.format_usage(), _append.format_help())
+    return SubparserHelp(cmds, _append)
+
+
+def _map_parser(cmds, subparsers, renamer):
+    """Map Command"""
+    _map = _parser(cmds, subparsers)
+    _map.description = "rename files using a csv or tsv table of old and new names"
+    _map.set_defaults(func=renamer.map_names)
+    _map.add_argument(
+        "filenames",
+        nargs="*",
+        help="tables with old name in the first column and new name in the second",
+    )
+    _map.add_argument(
+        "-k",
+        "--key",
+        dest="key",
+        choices=("path", "name", "stem"),
+        default="name",
+        help=(
+            "what the old name is matched against, the full path, the filename, "
+            "or the filename without extension (new name keeps the extension)"
+        ),
+    )
+    _map.add_argument(
+        "-d",
+        "--delimiter",
+        dest="delimiter",
+        default=None,
+        help="column separator, defaults to tab for .tsv files and comma otherwise",
+    )
+    _map.add_argument(
+        "--header",
+        dest="header",
+        action="store_true",
+        default=False,
+        help="skip the first row of each table",
+    )
+    return SubparserHelp(cmds, _map)
+
+
+def _number_parser(cmds, subparsers, renamer):
+    """Number Command"""
+    _number = _parser(cmds, subparsers)
+    _number.description = "number files in sorted order using a name template"
+    _number.set_defaults(func=renamer.number)
+    _number.add_argument(
+        "template",
+        nargs="?",
+        help=(
+            "new name where {n} is the number, {name} and {ext} the current name, "
+            "{size}, {mtime}, {ctime} and {atime} come from the file and "
+            "{exif.Tag} from its exif header, e.g. {mtime:%%Y%%m%%d}_{n:04d}"
+        ),
+    )
+    _number.add_argument(
+        "-m",
+        "--match",
+        dest="pattern",
+        default=None,
+        help="only number files whose name matches pattern",
+    )
+    _number.add_argument(
+        "-s",
+        "--start",
+        dest="start",
+        type=int,
+        default=1,
+        help="number of the first file",
+    )
+    _number.add_argument(
+        "--step",
+        dest="step",
+        type=int,
+        default=1,
+        help="amount to add to the number for each file",
+    )
+    _number.add_argument(
+        "-k",
+        "--sort",
+        dest="key",
+        choices=SORT_KEYS,
+        default="none",
+        help="sort files by name, modified time or size, defaults to listed order",
+    )
+    _number.add_argument(
+        "-r",
+        "--reverse",
+        dest="reverse",
+        action="store_true",
+        default=False,
+        help="sort in descending order",
+    )
+    _number.add_argument(
+        "-d",
+        "--per-dir",
+        dest="per_directory",
+        action="store_true",
+        default=False,
+        help="start numbering over in each directory",
+    )
+    return SubparserHelp(cmds, _number)
+
+
+def _hash_parser(cmds, subparsers, renamer):
+    """Hash Command"""
+    _hash = _parser(cmds, subparsers)
+    _hash.description = "rename files to the digest of their contents"
+    _hash.set_defaults(func=renamer.hash_names)
+    _hash.add_argument(
+        "-a",
+        "--algorithm",
+        dest="algorithm",
+        choices=ALGORITHMS,
+        default="sha256",
+        metavar="ALGORITHM",
+        help=f"hash algorithm to use ({', '.join(ALGORITHMS)}), defaults to sha256",
+    )
+    _hash.add_argument(
+        "-l",
+        "--length",
+        dest="length",
+        type=int,
+        default=None,
+        help="only keep the first length characters of the digest",
+    )
+    _hash.add_argument(
+        "-m",
+        "--match",
+        dest="pattern",
+        default=None,
+        help="only hash files whose name matches pattern",
+    )
+    _hash.add_argument(
+        "-j",
+        "--workers",
+        dest="workers",
+        type=int,
+        default=None,
+        help="number of processes to hash files with",
+    )
+    _hash.add_argument(
+        "--cache",
+        dest="cache",
+        default=None,
+        help="file digests are cached in, defaults to ~/.cache/brp/hashes.jsonl",
+    )
+    _hash.add_argument(
+        "--no-cache",
+        dest="no_cache",
+        action="store_true",
+        default=False,
+        help="hash every file again and don't save the digests",
+    )
+    return SubparserHelp(cmds, _hash)
 
 
 def _extension_parser(cmds, subparsers, renamer):
@@ -147,7 +398,10 @@ def _extension_parser(cmds, subparsers, renamer):
     _extension.description = (
         "change the extension on all files or files that match pattern"
     )
-    _extension.set_defaults(func=renamer.change_ext)
+    _extension.set_defaults(
+        func=renamer.change_ext,
+        transform=renamer.extension_transform,
+    )
     _extension.add_argument(
         "ext",
         nargs="?",
@@ -158,7 +412,7 @@ def _extension_parser(cmds, subparsers, renamer):
         nargs="?",
         help="pattern to match against old extensions",
     )
-    return SubparserHelp(cmds, _extension.format_usage(), _extension.format_help())
+    return SubparserHelp(cmds, _extension)
 
 
 def _prepend_parser(cmds, subparsers, renamer):
@@ -167,14 +421,20 @@ def _prepend_parser(cmds, subparsers, renamer):
     _prepend.description = (
         "tsv with pattern and value to prepend to each file that matches"
     )
-    _prepend.set_defaults(func=renamer.prepend)
+    _prepend.set_defaults(
+        func=renamer.prepend,
+        transform=renamer.pend_transform,
+        side=r"^",
+        value="{repl}{pad}",
+    )
     _prepend.add_argument(
         "find",
         nargs="?",
         help="regex pattern to match against",
     )
     _prepend.add_argument(
-        "prepend",
+        "replace",
+        metavar="prepend",
         nargs="?",
         help="value to prepend to filename",
     )
@@ -192,7 +452,7 @@ def _prepend_parser(cmds, subparsers, renamer):
         default=" ",
         help="string to insert between the value being prepended and the begining of the filename",
     )
-    return SubparserHelp(cmds, _prepend.format_usage(), _prepend.format_help())
+    return SubparserHelp(cmds, _prepend)
 
 
 def _insert_parser(cmds, subparsers, renamer):
@@ -216,7 +476,7 @@ def _insert_parser(cmds, subparsers, renamer):
             "negative numbers will insert counting from the end"
         ),
     )
-    return SubparserHelp(cmds, _insert.format_usage(), _insert.format_help())
+    return SubparserHelp(cmds, _insert)
 
 
 def _print_parser(cmds, subparsers, renamer):
@@ -224,14 +484,48 @@ def _print_parser(cmds, subparsers, renamer):
     _print = _parser(cmds, subparsers)
     _print.description = "lists current files being modified"
     _print.set_defaults(func=renamer.list_file_changes)
-    return SubparserHelp(cmds, _print.format_usage(), _print.format_help())
+    _print.add_argument(
+        "-n",
+        "--top",
+        dest="top",
+        type=int,
+        default=None,
+        help="only list the first TOP files",
+    )
+    return SubparserHelp(cmds, _print)
+
+
+def _stats_parser(cmds, subparsers, renamer):
+    """Stats Command"""
+    _stats = _parser(cmds, subparsers)
+    _stats.description = "show time spent and files changed by recent commands"
+    _stats.set_defaults(func=renamer.stats)
+    _stats.add_argument(
+        "-n",
+        "--last",
+        dest="last",
+        type=int,
+        default=10,
+        help="number of recent commands to show, defaults to 10",
+    )
+    _stats.add_argument(
+        "--clear",
+        dest="clear",
+        action="store_true",
+        default=False,
+        help="forget stats of every command run so far",
+    )
+    return SubparserHelp(cmds, _stats)
 
 
 def _find_replace_parser(cmds, subparsers, renamer):
     """Find_replace Command"""
     _find_replace = _parser(cmds, subparsers)
     _find_replace.description = "find and replace based on a regex"
-    _find_replace.set_defaults(func=renamer.find_and_replace)
+    _find_replace.set_defaults(
+        func=renamer.find_and_replace,
+        transform=renamer.replace_transform,
+    )
     _find_replace.add_argument(
         "find",
         nargs="?",
@@ -242,11 +536,35 @@ def _find_replace_parser(cmds, subparsers, renamer):
         nargs="?",
         help="pattern to insert",
     )
-    return SubparserHelp(
-        cmds,
-        _find_replace.format_usage(),
-        _find_replace.format_help(),
+    return SubparserHelp(cmds, _find_replace)
+
+
+def _preview_parser(cmds, subparsers, renamer):
+    """Preview Command"""
+    _preview = _parser(cmds, subparsers)
+    _preview.description = (
+        "try find and replace patterns on the files, then apply one or keep editing"
+    )
+    _preview.set_defaults(func=renamer.preview_replace)
+    _preview.add_argument(
+        "find",
+        nargs="?",
+        help="pattern to find",
+    )
+    _preview.add_argument(
+        "replace",
+        nargs="?",
+        help="pattern to insert",
+    )
+    _preview.add_argument(
+        "-n",
+        "--sample",
+        dest="sample",
+        type=int,
+        default=10,
+        help="number of changed files to show, defaults to 10",
     )
+    return SubparserHelp(cmds, _preview)
 
 
 def _save_parser(cmds, subparsers, renamer):
@@ -255,7 +573,8 @@ def _save_parser(cmds, subparsers, renamer):
     _save.description = "save files with current changes"
     _save.set_defaults(func=renamer.save)
     _save.add_argument(*CONFIRM_ARGS, **CONFIRM_KWARGS)
-    return SubparserHelp(cmds, _save.format_usage(), _save.format_help())
+    _save.add_argument(*WORKERS_ARGS, **WORKERS_KWARGS)
+    return SubparserHelp(cmds, _save)
 
 
 def _undo_parser(cmds, subparsers, renamer):
@@ -270,7 +589,7 @@ def _undo_parser(cmds, subparsers, renamer):
         default=1,
         help="number of changes to undo",
     )
-    return SubparserHelp(cmds, _undo.format_usage(), _undo.format_help())
+    return SubparserHelp(cmds, _undo)
 
 
 def _save_quit_parser(cmds, subparsers, renamer):
@@ -279,7 +598,7 @@ def _save_quit_parser(cmds, subparsers, renamer):
     _save_quit.description = "write changes and quit program, same as save then quit"
     _save_quit.set_defaults(func=renamer.save_and_quit)
     _save_quit.add_argument(*CONFIRM_ARGS, **CONFIRM_KWARGS)
-    return SubparserHelp(cmds, _save_quit.format_usage(), _save_quit.format_help())
+    return SubparserHelp(cmds, _save_quit)
 
 
 def _history_parser(cmds, subparsers, renamer):
@@ -295,7 +614,7 @@ def _history_parser(cmds, subparsers, renamer):
         default=False,
         help="just show single file history",
     )
-    return SubparserHelp(cmds, _history.format_usage(), _history.format_help())
+    return SubparserHelp(cmds, _history)
 
 
 def _reset_parser(cmds, subparsers, renamer):
@@ -304,7 +623,7 @@ def _reset_parser(cmds, subparsers, renamer):
     _reset.description = "reset changes to original inputs, no undoing"
     _reset.set_defaults(func=renamer.reset)
     _reset.add_argument(*CONFIRM_ARGS, **CONFIRM_KWARGS)
-    return SubparserHelp(cmds, _reset.format_usage(), _reset.format_help())
+    return SubparserHelp(cmds, _reset)
 
 
 def generate_parser(renamer):
@@ -328,14 +647,43 @@ def generate_parser(renamer):
         _save_quit_parser(("write", "w"), subparsers, renamer),
         _print_parser(("list", "ls", "l"), subparsers, renamer),
         _history_parser(("history", "hist", "past"), subparsers, renamer),
+        _stats_parser(("stats", "st"), subparsers, renamer),
         _undo_parser(("undo", "u"), subparsers, renamer),
         _reset_parser(("reset", "over", "o"), subparsers, renamer),
+        _session_parser(
+            ("save-session", "ss"),
+            subparsers,
+            renamer.save_snapshot,
+            "save files and their changes to a file to pick up later",
+        ),
+        _session_parser(
+            ("load-session", "ld"),
+            subparsers,
+            renamer.load_snapshot,
+            "load files and their changes from a saved session",
+        ),
+        _select_parser(
+            ("select", "sel"),
+            subparsers,
+            renamer.select,
+            "select files that later commands run on, or switch to a saved selection",
+        ),
+        _select_parser(
+            ("filter", "fl"),
+            subparsers,
+            renamer.filter_selection,
+            "narrow the active selection down to files that also match",
+        ),
         _automate_parser(("automate", "a", "auto"), subparsers, renamer),
         _find_replace_parser(("replace", "r", "re", "reg", "regex"), subparsers, renamer),
+        _preview_parser(("preview", "pv"), subparsers, renamer),
         _append_parser(("append", "ap"), subparsers, renamer),
+        _map_parser(("map", "mp"), subparsers, renamer),
         _prepend_parser(("prepend", "p", "pre"), subparsers, renamer),
         _insert_parser(("insert", "i", "in"), subparsers, renamer),
         _case_parser(("case", "c"), subparsers, renamer),
+        _number_parser(("number", "num", "n"), subparsers, renamer),
+        _hash_parser(("hash", "hs"), subparsers, renamer),
         _extension_parser(("extension", "x", "ext"), subparsers, renamer),
     ]
 
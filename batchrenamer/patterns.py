@@ -0,0 +1,63 @@
+"""Cache compiled regex patterns"""
+__all__ = ["CacheInfo", "PatternCache", "PATTERNS", "compile_pattern"]
+
+import re
+from collections import OrderedDict, namedtuple
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize"])
+
+
+class PatternCache:
+    """Least recently used cache of compiled regex patterns
+
+    :param maxsize: number of patterns to keep before evicting the oldest
+    :type maxsize: int
+    """
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+
+    def compile(self, pattern, flags=0):
+        """Get compiled pattern, compiling it if it hasn't been seen recently
+
+        Already compiled patterns are passed thru unchanged.
+        """
+        if isinstance(pattern, re.Pattern):
+            return pattern
+        key = (pattern, flags)
+        try:
+            compiled = self._cache[key]
+        except KeyError:
+            self.misses += 1
+            compiled = re.compile(pattern, flags)
+            self._cache[key] = compiled
+            if len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+        else:
+            self.hits += 1
+            self._cache.move_to_end(key)
+        return compiled
+
+    def info(self):
+        """Get hit and miss counts for the cache"""
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self._cache))
+
+    def clear(self):
+        """Remove all patterns and reset the counters"""
+        self._cache.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._cache)
+
+
+PATTERNS = PatternCache()
+
+
+def compile_pattern(pattern, flags=0):
+    """Compile pattern using the shared session cache"""
+    return PATTERNS.compile(pattern, flags)
@@ -0,0 +1,156 @@
+"""Write rename plans to a file and apply them later, one chain at a time"""
+__all__ = ["FORMATS", "write_plan", "read_plan", "apply_plan"]
+
+import json
+from itertools import islice
+from os import getcwd, path
+from struct import Struct
+
+from .journal import CWD
+from .planner import RenameStep
+from .saver import _rename_chunk
+
+FORMATS = ("jsonl", "binary")
+# version 1 plans have no working directory after the magic
+MAGIC_V1 = b"BRPPLAN\x01"
+MAGIC = b"BRPPLAN\x02"
+# chain id and partial flag of a step, then the length of each path
+HEADER = Struct(">IB")
+LENGTH = Struct(">I")
+
+
+def _encode(name):
+    return name.encode("utf-8", "surrogateescape")
+
+
+def _decode(data):
+    return data.decode("utf-8", "surrogateescape")
+
+
+def write_plan(filename, chains, binary=False):
+    """Write the steps of each chain to filename, in the order they run
+
+    Each step is one JSON list of chain id, old path, new path and partial
+    flag per line, or the same fields length prefixed in the binary format.
+    Both start with the working directory relative paths are resolved against.
+
+    :param filename: file to write the plan to
+    :type filename: str
+    :param chains: chains from :func:`~batchrenamer.planner.plan_renames`
+    :type chains: Iterable[list[RenameStep]]
+    :param binary: write the compact binary format instead of JSON lines
+    :type binary: bool
+    :return: number of steps written
+    :rtype: int
+    """
+    count = 0
+    cwd = getcwd()
+    if binary:
+        with open(filename, "wb") as fp:
+            fp.write(MAGIC)
+            fp.write(LENGTH.pack(len(_encode(cwd))) + _encode(cwd))
+            for chain_id, chain in enumerate(chains):
+                for step in chain:
+                    old, new = _encode(step.old), _encode(step.new)
+                    fp.write(HEADER.pack(chain_id, step.partial))
+                    fp.write(LENGTH.pack(len(old)) + old)
+                    fp.write(LENGTH.pack(len(new)) + new)
+                    count += 1
+        return count
+    with open(filename, "w", encoding="utf-8") as fp:
+        fp.write(json.dumps([CWD, cwd]) + "\n")
+        for chain_id, chain in enumerate(chains):
+            for step in chain:
+                fp.write(json.dumps([chain_id, step.old, step.new, step.partial]))
+                fp.write("\n")
+                count += 1
+    return count
+
+
+def _read_path(fp):
+    (size,) = LENGTH.unpack(fp.read(LENGTH.size))
+    return _decode(fp.read(size))
+
+
+def _read_records(fp):
+    """Chain id, old path, new path and partial flag of each step
+
+    The working directory comes first as its own record, if the plan has one.
+    """
+    magic = fp.read(len(MAGIC))
+    if magic not in (MAGIC, MAGIC_V1):
+        fp.seek(0)
+        for line in fp:
+            if line.strip():
+                yield tuple(json.loads(line))
+        return
+    if magic == MAGIC:
+        yield CWD, _read_path(fp)
+    while True:
+        header = fp.read(HEADER.size)
+        if not header:
+            return
+        chain_id, partial = HEADER.unpack(header)
+        old = _read_path(fp)
+        yield chain_id, old, _read_path(fp), bool(partial)
+
+
+def read_plan(filename):
+    """Yield each chain of steps in a plan file, reading one chain at a time
+
+    The format is worked out from the start of the file, and relative paths
+    are resolved against the directory the plan was written from.
+
+    :param filename: plan written by :func:`write_plan`
+    :type filename: str
+    """
+    with open(filename, "rb") as fp:
+        chain = []
+        current = None
+        cwd = ""
+        index = -1
+        for record in _read_records(fp):
+            if record[0] == CWD:
+                cwd = record[1]
+                continue
+            index += 1
+            chain_id, old, new, partial = record
+            old, new = path.join(cwd, old), path.join(cwd, new)
+            if chain_id != current and chain:
+                yield chain
+                chain = []
+            current = chain_id
+            chain.append(RenameStep(index, old, new, partial))
+        if chain:
+            yield chain
+
+
+def apply_plan(filename, journal=None, progress=None, chunksize=512):
+    """Rename files in the order of a plan file without loading all of it
+
+    Files on disk may have changed since the plan was written, so a step
+    onto a name that's taken fails instead of overwriting the file there.
+
+    :param filename: plan written by :func:`write_plan`
+    :type filename: str
+    :param journal: journal to record renames in before and after they happen
+    :type journal: Journal
+    :param progress: called with number of files done so far
+    :type progress: Callable[[int], None]
+    :param chunksize: number of chains to read and rename at once
+    :type chunksize: int
+    :return: number of files renamed and the failures
+    :rtype: tuple[int, list[RenameFailure]]
+    """
+    renamed = 0
+    failed = []
+    chains = read_plan(filename)
+    chunk = list(islice(chains, chunksize))
+    while chunk:
+        done, failures = _rename_chunk(chunk, journal, check_targets=True)
+        renamed += len(done)
+        failed.extend(failures)
+        if progress:
+            progress(renamed + len(failed))
+        chunk = list(islice(chains, chunksize))
+    return renamed, failed
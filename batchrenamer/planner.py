@@ -0,0 +1,115 @@
+"""Order renames so they don't overwrite each other"""
+__all__ = ["RenameStep", "RenameConflict", "RenamePlan", "plan_renames"]
+
+from collections import namedtuple
+from os import path, urandom
+
+
+class RenameStep(namedtuple("RenameStep", ["index", "old", "new", "partial"])):
+    """Single call to rename
+
+    :param index: index of the file being renamed
+    :type index: int
+    :param old: path the file is at
+    :type old: str
+    :param new: path to move the file to
+    :type new: str
+    :param partial: file is being moved to a temporary name to break a cycle
+    :type partial: bool
+    """
+
+    __slots__ = ()
+
+
+RenameConflict = namedtuple("RenameConflict", ["index", "old", "new", "reason"])
+RenamePlan = namedtuple("RenamePlan", ["chains", "conflicts"])
+
+
+def _target_taken(old, new, exists):
+    """Check if a file not being renamed is already at new"""
+    if not exists(new):
+        return False
+    try:
+        # case only renames on case insensitive filesystems
+        return not path.samefile(old, new)
+    except OSError:
+        return True
+
+
+def plan_renames(renames, exists=path.lexists):
+    """Build an ordered plan to rename files without overwriting any of them
+
+    Files that move onto a name another file is leaving wait for that file
+    to move first. Cycles of files swapping names are broken by moving one
+    file to a temporary name. Files whose new name is used by more than one
+    file, or by a file that isn't being renamed, are left out of the plan.
+
+    :param renames: index, old path and new path of each file to rename
+    :type renames: Iterable[tuple[int, str, str]]
+    :param exists: check if a path is taken on disk
+    :type exists: Callable[[str], bool]
+    :return: chains of steps that must run in order, chains can run in any
+        order, and the renames that were left out
+    :rtype: RenamePlan
+    """
+    by_old = {}
+    by_new = {}
+    duplicates = set()
+    for index, old, new in renames:
+        if old == new:
+            continue
+        by_old[old] = (index, old, new)
+        if new in by_new:
+            duplicates.add(new)
+        by_new[new] = (index, old, new)
+
+    conflicts = []
+    # file waiting for the file currently at its new name to move
+    waiting = {}
+    blocked = []
+    for item in by_old.values():
+        index, old, new = item
+        if new in duplicates:
+            conflicts.append(RenameConflict(index, old, new, "duplicate target"))
+        elif new in by_old:
+            waiting[new] = item
+        elif _target_taken(old, new, exists):
+            conflicts.append(RenameConflict(index, old, new, "target exists"))
+        else:
+            continue
+        blocked.append(item)
+
+    # anything waiting on a file that can't move can't move either
+    for conflict in list(conflicts):
+        item = waiting.pop(conflict.old, None)
+        while item is not None:
+            index, old, new = item
+            conflicts.append(RenameConflict(index, old, new, "target not freed"))
+            item = waiting.pop(old, None)
+
+    chains = []
+    blocked_olds = {item[1] for item in blocked}
+    for item in by_old.values():
+        if item[1] in blocked_olds:
+            continue
+        chain = []
+        while item is not None:
+            chain.append(RenameStep(*item, False))
+            item = waiting.pop(item[1], None)
+        chains.append(chain)
+
+    # whatever is still waiting is part of a cycle
+    token = urandom(4).hex()
+    while waiting:
+        start = next(iter(waiting.values()))
+        index, old, new = start
+        temp = path.join(path.dirname(old), f".{path.basename(old)}.brp-{token}")
+        chain = [RenameStep(index, old, temp, True)]
+        item = waiting.pop(old)
+        while item is not start:
+            chain.append(RenameStep(*item, False))
+            item = waiting.pop(item[1])
+        chain.append(RenameStep(index, temp, new, False))
+        chains.append(chain)
+
+    return RenamePlan(chains, conflicts)
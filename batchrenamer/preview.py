@@ -0,0 +1,65 @@
+"""Try out a transform on the files without changing or logging anything"""
+__all__ = ["Preview", "preview"]
+
+from collections import namedtuple
+from itertools import islice
+
+
+class Preview(namedtuple("Preview", ["sample", "changed", "checked", "total"])):
+    """Progress of a preview so far
+
+    :param sample: first files the transform changes, as index, old name and
+        extension, and new name and extension
+    :type sample: list[tuple[int, tuple[str, str], tuple[str, str]]]
+    :param changed: number of files the transform changes so far
+    :type changed: int
+    :param checked: number of files checked so far
+    :type checked: int
+    :param total: number of files to check
+    :type total: int
+    """
+
+    __slots__ = ()
+
+    @property
+    def finished(self):
+        """Every file has been checked"""
+        return self.checked >= self.total
+
+
+def preview(files, func, indices=None, sample=10, chunksize=1 << 14):
+    """Run transform over the new names of files without changing them
+
+    Files are checked a chunk at a time and the progress is yielded after
+    each one, so results can be shown before the whole batch is done and
+    the caller can stop at any point by no longer iterating.
+
+    :param files: files to try the transform on
+    :type files: FileBatch | FileColumns
+    :param func: transform from :mod:`~batchrenamer.transforms`
+    :type func: Callable[[str, str], tuple[str, str]]
+    :param indices: files to check, defaults to all of them
+    :type indices: Iterable[int]
+    :param sample: most changed files to keep for showing
+    :type sample: int
+    :param chunksize: files to check between each progress
+    :type chunksize: int
+    :rtype: Iterator[Preview]
+    """
+    total = len(files) if indices is None else len(indices)
+    names = files.iter_names(indices)
+    shown = []
+    changed = 0
+    checked = 0
+    while True:
+        chunk = list(islice(names, chunksize))
+        for idx, name, ext in chunk:
+            new_name, new_ext = func(name, ext)
+            if new_name != name or new_ext != ext:
+                changed += 1
+                if len(shown) < sample:
+                    shown.append((idx, (name, ext), (new_name, new_ext)))
+        checked += len(chunk)
+        yield Preview(list(shown), changed, checked, total)
+        if len(chunk) < chunksize:
+            return
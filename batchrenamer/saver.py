@@ -0,0 +1,142 @@
+"""Rename files on disk, optionally with multiple threads"""
+__all__ = ["RenameFailure", "SaveReport", "save_renames"]
+
+from collections import namedtuple
+from itertools import islice
+from os import path, rename
+
+from .planner import _target_taken
+
+RenameFailure = namedtuple("RenameFailure", ["index", "old", "new", "error"])
+SaveReport = namedtuple("SaveReport", ["renamed", "failed"])
+
+
+def _group_by_directory(chains, chunksize):
+    """Split chains into chunks that only touch a single directory"""
+    groups = {}
+    for chain in chains:
+        groups.setdefault(path.dirname(chain[0].old), []).append(chain)
+    for group in groups.values():
+        items = iter(group)
+        chunk = list(islice(items, chunksize))
+        while chunk:
+            yield chunk
+            chunk = list(islice(items, chunksize))
+
+
+def _restore_partial(chain, pos, step_ids, undone_ids):
+    """Move files a failed chain left at a temporary name back to their old name
+
+    :return: where each file not moved to its new name is now, keyed by the
+        temporary name it was or would have been moved to
+    :rtype: dict[str, str]
+    """
+    paths = {}
+    for done_pos, step in enumerate(chain[:pos]):
+        if not step.partial or path.lexists(step.old):
+            # old name was taken by the next file in the cycle, leave it
+            continue
+        try:
+            rename(step.new, step.old)
+        except OSError:
+            continue
+        paths[step.new] = step.old
+        undone_ids.append(step_ids[done_pos])
+    # files never moved to their temporary name are still at the old one
+    paths.update((step.new, step.old) for step in chain[pos:] if step.partial)
+    return paths
+
+
+def _rename_chunk(chunk, journal=None, check_targets=False):
+    """Rename every chain in chunk, collecting failures instead of stopping
+
+    A chain stops at its first failure since the steps after it depend on it,
+    and a file it moved to a temporary name is moved back if it can be.
+    With check_targets, steps onto a name that's already taken fail instead
+    of overwriting it, for plans that weren't made just now.
+    """
+    renamed = []
+    failed = []
+    done_ids = []
+    failed_ids = []
+    undone_ids = []
+    if journal:
+        ids = iter(journal.begin(step for chain in chunk for step in chain))
+    for chain in chunk:
+        step_ids = [next(ids) for _ in chain] if journal else [None] * len(chain)
+        for pos, step in enumerate(chain):
+            try:
+                if (
+                    check_targets
+                    and not step.partial
+                    and _target_taken(step.old, step.new, path.lexists)
+                ):
+                    raise FileExistsError(f"{step.new} already exists")
+                rename(step.old, step.new)
+            except OSError as e:
+                paths = _restore_partial(chain, pos, step_ids, undone_ids)
+                failed.extend(
+                    RenameFailure(s.index, paths.get(s.old, s.old), s.new, e)
+                    for s in chain[pos:]
+                    if not s.partial
+                )
+                failed_ids.extend(step_ids[pos:])
+                break
+            done_ids.append(step_ids[pos])
+            if not step.partial:
+                renamed.append(step.index)
+    if journal:
+        journal.finish(done_ids, failed_ids)
+        for entry_id in undone_ids:
+            journal.undone(entry_id)
+    return renamed, failed
+
+
+def save_renames(chains, workers=1, progress=None, chunksize=512, journal=None):
+    """Rename files, grouping them by directory
+
+    :param chains: steps from :func:`~batchrenamer.planner.plan_renames`,
+        steps in a chain are run in order
+    :type chains: Iterable[list[RenameStep]]
+    :param workers: number of threads to rename with, 1 renames in order
+        without starting any threads
+    :type workers: int
+    :param progress: called with number of files done and the total
+    :type progress: Callable[[int, int], None]
+    :param chunksize: most chains from one directory given to a thread at once
+    :type chunksize: int
+    :param journal: journal to record renames in before and after they happen
+    :type journal: Journal
+    :return: indices that were renamed and the failures
+    :rtype: SaveReport
+    """
+    chains = list(chains)
+    total = sum(1 for chain in chains for step in chain if not step.partial)
+    report = SaveReport([], [])
+    done = 0
+
+    def _collect(result):
+        nonlocal done
+        report.renamed.extend(result[0])
+        report.failed.extend(result[1])
+        done += len(result[0]) + len(result[1])
+        if progress:
+            progress(done, total)
+
+    if workers <= 1:
+        for chunk in _group_by_directory(chains, chunksize):
+            _collect(_rename_chunk(chunk, journal))
+        return report
+
+    # pylint: disable=import-outside-toplevel
+    # thread pools are slow to import, only load them when they're used
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(_rename_chunk, chunk, journal)
+            for chunk in _group_by_directory(chains, chunksize)
+        ]
+        for future in as_completed(futures):
+            _collect(future.result())
+    return report
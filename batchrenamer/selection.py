@@ -0,0 +1,150 @@
+"""Named selections of files so commands only run on part of a batch"""
+__all__ = ["FileIndex", "Selections"]
+
+from fnmatch import translate
+from os import path
+
+from .patterns import compile_pattern
+
+
+def _ext(ext):
+    """Extension as it's indexed, lower case with the leading dot"""
+    ext = ext.lower()
+    return ext if not ext or ext.startswith(".") else f".{ext}"
+
+
+class FileIndex:
+    """Indices of files grouped by extension and by directory, kept up to date
+
+    Directories never change, so only extensions are moved as files change.
+
+    :param files: files to index
+    :type files: FileBatch | FileColumns
+    """
+
+    def __init__(self, files):
+        self.exts = {}
+        self.dirs = {}
+        for idx, file_ in enumerate(files):
+            info = file_.rename
+            self.exts.setdefault(_ext(info.ext), set()).add(idx)
+            self.dirs.setdefault(path.normpath(info.directory), []).append(idx)
+
+    def update(self, files, changes):
+        """Move changed files from their previous extension to their new one"""
+        exts = self.exts
+        for idx, before in changes.items():
+            old = _ext(before.ext)
+            new = _ext(files[idx].rename.ext)
+            if old != new:
+                found = exts.get(old, set())
+                found.discard(idx)
+                if not found:
+                    exts.pop(old, None)
+                exts.setdefault(new, set()).add(idx)
+
+    def with_ext(self, exts):
+        """Indices of files with any of the extensions"""
+        found = set()
+        for ext in exts:
+            found.update(self.exts.get(_ext(ext), ()))
+        return found
+
+    def in_dir(self, directories):
+        """Indices of files directly in any of the directories"""
+        found = set()
+        for directory in directories:
+            found.update(self.dirs.get(path.normpath(directory), ()))
+        return found
+
+
+class Selections:
+    """Named subsets of files and the one commands currently run on
+
+    Extension and directory lookups go thru a :class:`FileIndex`, built the
+    first time it's needed. Globs and regexes only go over the files left
+    after those, so narrowing a small selection never looks at the rest.
+    """
+
+    def __init__(self):
+        self.named = {}
+        self.active = None
+        self.index = None
+
+    @property
+    def indices(self):
+        """Indices of the files in the active selection, None for every file"""
+        return None if self.active is None else self.named[self.active]
+
+    def update(self, files, changes):
+        """Keep the index in step with files that changed"""
+        if self.index is not None:
+            self.index.update(files, changes)
+
+    def clear(self):
+        """Forget every selection and the index, for when the files are replaced"""
+        self.named.clear()
+        self.active = None
+        self.index = None
+
+    def find(self, files, candidates=None, globs=(), regexes=(), exts=(), dirs=()):
+        """Indices of files that match every kind of criteria given
+
+        Files only need to match one value of each kind. Globs are matched
+        against the whole new name with its extension, regexes against the
+        new name without it.
+
+        :param files: files to select from
+        :type files: FileBatch | FileColumns
+        :param candidates: files to look in, defaults to all of them
+        :type candidates: Iterable[int]
+        :param globs: shell style patterns
+        :type globs: list[str]
+        :param regexes: regex patterns
+        :type regexes: list[str]
+        :param exts: extensions, with or without the dot
+        :type exts: list[str]
+        :param dirs: directories the files are directly in
+        :type dirs: list[str]
+        :return: matching indices in order
+        :rtype: list[int]
+        """
+        found = None if candidates is None else set(candidates)
+        if exts or dirs:
+            if self.index is None:
+                self.index = FileIndex(files)
+            for values, lookup in (
+                (exts, self.index.with_ext),
+                (dirs, self.index.in_dir),
+            ):
+                if values:
+                    matches = lookup(values)
+                    found = matches if found is None else found & matches
+        indices = range(len(files)) if found is None else sorted(found)
+        if not (globs or regexes):
+            return list(indices)
+        globbed = [compile_pattern(translate(glob)).match for glob in globs]
+        searched = [compile_pattern(regex).search for regex in regexes]
+        kept = []
+        for idx in indices:
+            info = files[idx].rename
+            if globbed and not any(m(f"{info.name}{info.ext}") for m in globbed):
+                continue
+            if searched and not any(search(info.name) for search in searched):
+                continue
+            kept.append(idx)
+        return kept
+
+    def add(self, name, indices):
+        """Save indices under name and make it the active selection"""
+        self.named[name] = indices
+        self.active = name
+
+    def use(self, name):
+        """Make a saved selection active, None goes back to every file
+
+        :raises KeyError: there's no selection with that name
+        """
+        if name is not None and name not in self.named:
+            raise KeyError(name)
+        self.active = name
@@ -0,0 +1,174 @@
+"""Save the files and their history to a snapshot and load them back"""
+__all__ = ["save_session", "load_session"]
+
+import json
+from collections.abc import Mapping
+from os import replace
+
+from .columns import FileColumns
+from .filehistory import FileBatch, FileHistory, FileInfo
+from .oplog import OperationLog
+
+VERSION = 1
+
+
+def _split(infos):
+    """Names and extensions of infos as two columns"""
+    infos = list(infos)
+    return [info.name for info in infos], [info.ext for info in infos]
+
+
+class SnapshotChanges(Mapping):
+    """Changes of a loaded operation, only turned into names when first used
+
+    Most operations in a session are never undone, so loading keeps the
+    columns from the snapshot and saving writes them back out as they are.
+    """
+
+    __slots__ = ("columns", "_directory", "_changes")
+
+    def __init__(self, indices, names, exts, directory):
+        self.columns = (indices, names, exts)
+        self._directory = directory
+        self._changes = None
+
+    @property
+    def changes(self):
+        """Previous name of each changed file keyed by index"""
+        if self._changes is None:
+            directory = self._directory
+            self._changes = {
+                idx: FileInfo(directory(idx), name, ext)
+                for idx, name, ext in zip(*self.columns)
+            }
+        return self._changes
+
+    def __getitem__(self, index):
+        return self.changes[index]
+
+    def __contains__(self, index):
+        return index in self.changes
+
+    def __iter__(self):
+        return iter(self.columns[0])
+
+    def __len__(self):
+        return len(self.columns[0])
+
+
+def _operation(operation):
+    """Label, indices, names and extensions of an operation"""
+    changes = operation.changes
+    if isinstance(changes, SnapshotChanges):
+        return [operation.label, *changes.columns]
+    return [operation.label, list(changes), *_split(changes.values())]
+
+
+def _columns(files):
+    """Directory table and name columns of either file backend"""
+    if isinstance(files, FileColumns):
+        current = None if files.current is files.original else files.current
+        return {
+            "directories": files.directories,
+            "dir_index": files.dir_index.tolist(),
+            "original": files.original,
+            "current": current,
+            "rename": (files.names, files.exts),
+        }
+    directories = {}
+    dir_index = []
+    for file_ in files:
+        directory = file_.original.directory
+        dir_index.append(directories.setdefault(directory, len(directories)))
+    unsaved = all(file_.current is file_.original for file_ in files)
+    return {
+        "directories": list(directories),
+        "dir_index": dir_index,
+        "original": _split(file_.original for file_ in files),
+        "current": None if unsaved else _split(file_.current for file_ in files),
+        "rename": _split(file_.rename for file_ in files),
+    }
+
+
+def save_session(filename, files, log):
+    """Write files and the operations made to them to a snapshot
+
+    Files are stored as columns with each directory stored once, and each
+    operation as the indices, names and extensions it changed. The snapshot
+    is written next to filename and moved over it once it's complete.
+
+    :param filename: file to save the snapshot to
+    :type filename: str
+    :param files: files to save
+    :type files: FileBatch | FileColumns
+    :param log: operations made to the files
+    :type log: OperationLog
+    """
+    snapshot = _columns(files)
+    snapshot["version"] = VERSION
+    snapshot["log"] = [_operation(operation) for operation in log.operations]
+    temp = f"{filename}.tmp"
+    with open(temp, "w", encoding="utf-8") as fp:
+        fp.write(json.dumps(snapshot, separators=(",", ":")))
+    replace(temp, filename)
+
+
+def _batch(directories, dir_index, original, current, rename_):
+    """Rebuild file histories from the name columns"""
+    files = FileBatch()
+    orig_names, orig_exts = original
+    cur_names, cur_exts = current or original
+    new_names, new_exts = rename_
+    for idx, dir_id in enumerate(dir_index):
+        directory = directories[dir_id]
+        first = FileInfo(directory, orig_names[idx], orig_exts[idx])
+        infos = [first]
+        for names, exts in ((cur_names, cur_exts), (new_names, new_exts)):
+            info = FileInfo(directory, names[idx], exts[idx])
+            infos.append(first if info == first else info)
+        files.append(FileHistory.from_infos(*infos))
+    return files
+
+
+def load_session(filename, columnar=False):
+    """Read files and the operations made to them from a snapshot
+
+    :param filename: snapshot written by :func:`save_session`
+    :type filename: str
+    :param columnar: load files into :class:`~batchrenamer.FileColumns`
+    :type columnar: bool
+    :return: files and the operations made to them
+    :rtype: tuple[FileBatch | FileColumns, OperationLog]
+    :raises ValueError: file isn't a snapshot this version can read
+    """
+    with open(filename, "r", encoding="utf-8") as fp:
+        snapshot = json.load(fp)
+    if not isinstance(snapshot, dict) or snapshot.get("version") != VERSION:
+        raise ValueError(f"{filename} is not a session snapshot")
+
+    directories = snapshot["directories"]
+    dir_index = snapshot["dir_index"]
+    if columnar:
+        files = FileColumns.from_columns(
+            directories,
+            dir_index,
+            snapshot["original"],
+            snapshot["current"],
+            *snapshot["rename"],
+        )
+    else:
+        files = _batch(
+            directories,
+            dir_index,
+            snapshot["original"],
+            snapshot["current"],
+            snapshot["rename"],
+        )
+
+    def directory(idx):
+        return directories[dir_index[idx]]
+
+    log = OperationLog()
+    for label, indices, names, exts in snapshot["log"]:
+        log.record(label, SnapshotChanges(indices, names, exts, directory))
+    return files, log
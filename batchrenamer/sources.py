@@ -0,0 +1,71 @@
+"""Stream filenames from lists and directory walks"""
+__all__ = ["read_names", "read_file_list", "walk"]
+
+import sys
+from fnmatch import fnmatch
+from os import scandir
+
+
+def read_names(stream, null=False, size=65536):
+    """Yield filenames from a stream one at a time
+
+    :param stream: text stream of filenames
+    :type stream: TextIO
+    :param null: filenames are separated by null characters instead of newlines
+    :type null: bool
+    :param size: number of characters to read at once when null separated
+    :type size: int
+    """
+    if not null:
+        for line in stream:
+            line = line.rstrip("\r\n")
+            if line:
+                yield line
+        return
+    rest = ""
+    while True:
+        chunk = stream.read(size)
+        if not chunk:
+            break
+        names = (rest + chunk).split("\0")
+        rest = names.pop()
+        yield from (name for name in names if name)
+    if rest:
+        yield rest
+
+
+def read_file_list(filename, null=False):
+    """Yield filenames listed in a file, none if it can't be opened"""
+    try:
+        fp = open(filename, "r", encoding="utf-8", newline="")
+    except OSError as e:
+        print(f"Unable to open {filename}: {e.strerror}; skipping", file=sys.stderr)
+        return
+    with fp:
+        yield from read_names(fp, null)
+
+
+def walk(top, patterns=None):
+    """Yield files under top, recursively, that match any of the glob patterns
+
+    :param top: directory to start in
+    :type top: str
+    :param patterns: glob patterns matched against the filename, all files
+        are yielded if not given
+    :type patterns: list[str]
+    """
+    stack = [top]
+    while stack:
+        try:
+            entries = scandir(stack.pop())
+        except OSError as e:
+            print(f"Unable to scan {e.filename}; skipping", file=sys.stderr)
+            continue
+        with entries:
+            subdirs = []
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                elif not patterns or any(fnmatch(entry.name, pat) for pat in patterns):
+                    yield entry.path
+        stack.extend(reversed(subdirs))
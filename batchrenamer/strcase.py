@@ -1,6 +1,13 @@
 """Methods to change the case of strings"""
 import re
-from random import random
+from functools import partial
+from random import Random, random
+
+SPACES = re.compile(r"\s+")
+# empty match before each capital, for unsquashing ascii names
+CAPITALS = re.compile(r"(?=[A-Z])")
+# bit that flips the case of each ascii letter, nothing for other bytes
+CASE_BITS = bytes(0x20 if chr(c).isalpha() else 0 for c in range(128)).ljust(256, b"\0")
 
 
 def default(string):
@@ -45,12 +52,12 @@ def desnake(string):
 
 def squash(string):
     """File  name -> filename"""
-    return re.sub(r"\s+", "", string).strip()
+    return SPACES.sub("", string)
 
 
 def trim(string):
     """Long  File   Name -> Long File Name"""
-    return re.sub(r"\s+", " ", string).strip()
+    return SPACES.sub(" ", string).strip()
 
 
 def camel(string):
@@ -68,21 +75,21 @@ def pascal(string):
 
 def unsquash(string):
     """camelCase / PascalCase -> camel Case / Pascal Case"""
-    new = ""
-    for char in string:
-        new += f" {char}" if char.isupper() else char
-    return new.strip()
-
-
-def sponge(string):
-    """sPonGeBOb CasE"""
-    new = ""
-    for char in string:
-        if char.isalpha():
-            new += char.upper() if random() > 0.5 else char.lower()
-        else:
-            new += char
-    return new
+    return "".join([f" {char}" if char.isupper() else char for char in string]).strip()
+
+
+def sponge(string, rng=None):
+    """sPonGeBOb CasE
+
+    :param rng: random number generator to use, seed one for repeatable results
+    :type rng: random.Random
+    """
+    if not string:
+        return string
+    if string.isascii():
+        return _flip_ascii(string, rng or Random())
+    rand = rng.random if rng else random
+    return "".join([char.upper() if rand() > 0.5 else char.lower() for char in string])
 
 CASE = {
     "upper": upper, "u": upper,
@@ -104,3 +111,102 @@ CASE = {
 
     "default": default,
 }
+
+
+def _flip_ascii(string, rng):
+    """Flip the case of random letters, all at once as one big integer"""
+    data = string.lower().encode("ascii")
+    size = len(data)
+    bits = int.from_bytes(data.translate(CASE_BITS), "big")
+    bits &= int.from_bytes(rng.randbytes(size), "big")
+    return (int.from_bytes(data, "big") ^ bits).to_bytes(size, "big").decode("ascii")
+
+
+def _sponge_all(strings, seed=None):
+    rng = Random(seed)
+    # filenames can't contain null, so it safely separates them
+    joined = "\0".join(strings)
+    if strings and joined.isascii():
+        return _flip_ascii(joined, rng).split("\0")
+    return [sponge(string, rng) for string in strings]
+
+
+def _unsquash_all(strings):
+    # one regex pass over every name beats a python loop over each character
+    joined = "\0".join(strings)
+    if strings and joined.isascii():
+        return [string.strip() for string in CAPITALS.sub(" ", joined).split("\0")]
+    return [unsquash(string) for string in strings]
+
+
+def _camel_all(strings):
+    # title starts a word after any whitespace, so titling everything after the
+    # first word then splitting it once is the same as titling each word
+    changed = []
+    for string in strings:
+        parts = string.split(None, 1)
+        if len(parts) > 1:
+            changed.append(parts[0].lower() + "".join(parts[1].title().split()))
+        else:
+            changed.append(string.strip().lower())
+    return changed
+
+
+def _pascal_all(strings):
+    return ["".join(string.title().split()) for string in strings]
+
+
+def _join_all(sep, split_on, strings):
+    return [sep.join(string.split(split_on)) for string in strings]
+
+
+def _sub_all(repl, strings, strip=False):
+    sub = partial(SPACES.sub, repl)
+    if strip:
+        return [sub(string).strip() for string in strings]
+    return list(map(sub, strings))
+
+
+BATCH = {
+    upper: partial(map, str.upper),
+    lower: partial(map, str.lower),
+    title: partial(map, str.title),
+    kebab: partial(_join_all, "-", None),
+    snake: partial(_join_all, "_", None),
+    dekebab: partial(_join_all, " ", "-"),
+    desnake: partial(_join_all, " ", "_"),
+    squash: partial(_sub_all, ""),
+    trim: partial(_sub_all, " ", strip=True),
+    camel: _camel_all,
+    pascal: _pascal_all,
+    unsquash: _unsquash_all,
+}
+
+
+def convert(strings, cases, seed=None):
+    """Change the case of many strings at once
+
+    Each style is looked up once and run over every string before the next
+    style, instead of running every style on one string at a time.
+
+    :param strings: strings to change
+    :type strings: list[str]
+    :param cases: names of styles in :data:`CASE` to run in order
+    :type cases: list[str]
+    :param seed: seed for the random number generator used by sponge case
+    :type seed: int
+    :return: changed strings in the same order
+    :rtype: list[str]
+    """
+    strings = list(strings)
+    for case in cases:
+        func = CASE.get(case, CASE["default"])
+        if func is default:
+            continue
+        if func is sponge:
+            strings = _sponge_all(strings, seed)
+        elif func in BATCH:
+            strings = list(BATCH[func](strings))
+        else:
+            strings = list(map(func, strings))
+    return strings
@@ -0,0 +1,105 @@
+"""Pure name transforms that can be chained into a single pass over the files
+
+Each function builds a transform that takes the name and extension of a
+file and returns the new name and extension. :func:`steps` and
+:func:`pend_index` build step functions that yield the position of each
+change along with the new name and extension, which file backends run with
+``apply_steps``.
+"""
+__all__ = ["replace", "case", "extension", "pend", "steps", "pend_index"]
+
+from functools import partial
+from random import Random
+from sys import intern
+
+from .matcher import PatternIndex
+from .patterns import compile_pattern
+from .strcase import CASE, sponge
+
+
+def replace(find, repl):
+    """Find and replace value in the name"""
+    sub = compile_pattern(find).sub
+
+    def _replace(name, ext):
+        return sub(repl, name), ext
+
+    return _replace
+
+
+def case(cases, seed=None):
+    """Change the case of the name"""
+    funcs = [CASE.get(style, CASE["default"]) for style in cases]
+    if sponge in funcs:
+        funcs = [partial(sponge, rng=Random(seed)) if f is sponge else f for f in funcs]
+
+    def _case(name, ext):
+        for func in funcs:
+            name = func(name)
+        return name, ext
+
+    return _case
+
+
+def extension(new_ext, pattern=None):
+    """Change the extension, only for names matching pattern if given"""
+    new_ext = intern(new_ext if new_ext[0] == "." else f".{new_ext}")
+    search = compile_pattern(pattern).search if pattern else None
+
+    def _extension(name, ext):
+        if search is None or search(name):
+            return name, new_ext
+        return name, ext
+
+    return _extension
+
+
+def pend(find, side, repl):
+    """Replace side (start or end) of names that match find with repl"""
+    search = compile_pattern(find).search
+    sub = compile_pattern(side).sub
+
+    def _pend(name, ext):
+        if search(name):
+            return sub(repl, name), ext
+        return name, ext
+
+    return _pend
+
+
+def steps(funcs):
+    """Run transforms in order, yielding the ones that changed the name"""
+
+    def _steps(name, ext):
+        for pos, func in enumerate(funcs):
+            new_name, new_ext = func(name, ext)
+            if new_name != name or new_ext != ext:
+                yield pos, new_name, new_ext
+                name, ext = new_name, new_ext
+
+    return _steps
+
+
+def pend_index(pairs, side):
+    """Pend values to names matching patterns, looking up every pattern at once
+
+    Names are matched against all of the patterns once, before any values
+    are added, then the values of every match are added in order.
+
+    :param pairs: patterns and the value to add to names that match each
+    :type pairs: list[tuple[str, str]]
+    :param side: start or end of the name to add values to
+    :type side: str
+    """
+    index = PatternIndex([find for find, _ in pairs])
+    repls = [repl for _, repl in pairs]
+    sub = compile_pattern(side).sub
+
+    def _pend_index(name, ext):
+        for pos in index.matches(name):
+            new_name = sub(repls[pos], name)
+            if new_name != name:
+                yield pos, new_name, ext
+                name = new_name
+
+    return _pend_index
@@ -0,0 +1,215 @@
+"""Time core rename operations on synthetic batches of files
+
+Each size gets a fresh directory of empty files, on tmpfs when there is one,
+and runs the same commands in order. Times (and peak memory with
+``--memory``) are compared against a stored baseline, and the run fails if
+any of them got worse by more than the tolerance.
+
+Run from the root of the repo::
+
+    python -m benchmarks.run --sizes 1000 10000 --save-baseline baseline.json
+    python -m benchmarks.run --sizes 1000 10000 --baseline baseline.json
+"""
+import json
+import sys
+import tracemalloc
+from argparse import ArgumentParser
+from contextlib import redirect_stdout
+from os import devnull, makedirs, path
+from shutil import rmtree
+from tempfile import mkdtemp
+from time import perf_counter
+
+from batchrenamer import BatchRenamer
+
+TAGS = ("live", "remaster", "demo", "edit", "mono", "single", "bonus")
+# changes smaller than this are noise, however large they are relatively
+NOISE = 0.05
+
+
+def synthetic_names(size, root):
+    """Paths of size files spread over directories of about 1000 each"""
+    dirs = max(1, size // 1000)
+    return [
+        path.join(
+            root,
+            f"dir{idx % dirs:04d}",
+            f"Track {idx:07d} - Artist {idx % 997} [{TAGS[idx % len(TAGS)]}].mp3",
+        )
+        for idx in range(size)
+    ]
+
+
+def _make_files(names):
+    for directory in {path.dirname(name) for name in names}:
+        makedirs(directory, exist_ok=True)
+    for name in names:
+        open(name, "w").close()
+
+
+def _pattern_file(root, count=1000):
+    """File of count patterns for append, like a large episode list"""
+    filename = path.join(root, "patterns.txt")
+    with open(filename, "w", encoding="utf-8") as fp:
+        for num in range(count):
+            fp.write(f'"Artist {num} " X{num}\n')
+    return filename
+
+
+def _run(renamer, *cmd):
+    args = renamer.parser.parse_args(list(cmd))
+    args.func(args)
+
+
+def _steps(names, patterns, columnar, save):
+    """Operation names and functions to run in order on one batch"""
+    renamer = None
+
+    def construct():
+        nonlocal renamer
+        renamer = BatchRenamer(*names, columnar=columnar)
+
+    steps = [
+        ("construct", construct),
+        ("replace", lambda: _run(renamer, "re", "Track", "Song")),
+        ("case", lambda: _run(renamer, "case", "title")),
+        ("extension", lambda: _run(renamer, "ext", "flac", "Artist 1")),
+        ("pend_file", lambda: _run(renamer, "ap", "-f", patterns)),
+        ("history", lambda: _run(renamer, "hist")),
+        # the replace is kept so every file still has a rename to save
+        ("undo", lambda: _run(renamer, "undo", str(len(renamer.log) - 1))),
+    ]
+    if save:
+        steps.append(("save", lambda: _run(renamer, "save", "-c")))
+    return steps
+
+
+def run_size(size, tmp, columnar=False, memory=False, save_limit=100_000):
+    """Seconds, or peak bytes allocated with memory, of each operation"""
+    root = path.join(tmp, str(size))
+    rmtree(root, ignore_errors=True)
+    names = synthetic_names(size, root)
+    save = size <= save_limit
+    if save:
+        _make_files(names)
+    else:
+        makedirs(root, exist_ok=True)
+    patterns = _pattern_file(root)
+
+    results = {}
+    with open(devnull, "w", encoding="utf-8") as out, redirect_stdout(out):
+        for name, func in _steps(names, patterns, columnar, save):
+            if memory:
+                tracemalloc.start()
+                func()
+                results[name] = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+            else:
+                start = perf_counter()
+                func()
+                results[name] = perf_counter() - start
+    rmtree(root, ignore_errors=True)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Measurements that are worse than the baseline by more than tolerance"""
+    regressions = []
+    for size, measures in results.items():
+        for key, ops in measures.items():
+            for name, value in ops.items():
+                base = baseline.get(size, {}).get(key, {}).get(name)
+                if base is None:
+                    continue
+                floor = NOISE if key == "seconds" else 0
+                if value > base * (1 + tolerance) and value - base > floor:
+                    regressions.append((size, key, name, base, value))
+    return regressions
+
+
+def _print_table(results):
+    print(f"{'size':>9}  {'operation':<10} {'seconds':>9} {'peak MiB':>9}")
+    for size, measures in results.items():
+        for name, seconds in measures["seconds"].items():
+            peak = measures.get("peak", {}).get(name)
+            peak = f"{peak / 2**20:9.1f}" if peak is not None else f"{'-':>9}"
+            print(f"{size:>9}  {name:<10} {seconds:9.3f} {peak}")
+
+
+def main():
+    """Run benchmarks and compare them to the baseline"""
+    parser = ArgumentParser(
+        prog="python -m benchmarks.run",
+        description="time core rename operations on synthetic batches of files",
+    )
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[1000, 10_000, 100_000],
+        help="number of files in each batch",
+    )
+    parser.add_argument(
+        "--columnar",
+        action="store_true",
+        default=False,
+        help="store files in columns",
+    )
+    parser.add_argument(
+        "--memory",
+        action="store_true",
+        default=False,
+        help="run everything a second time to record peak memory",
+    )
+    parser.add_argument(
+        "--save-limit",
+        type=int,
+        default=100_000,
+        help="only create files and time saving for batches up to this size",
+    )
+    parser.add_argument("--baseline", help="fail if slower than this baseline")
+    parser.add_argument("--save-baseline", help="write results as a new baseline")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="fraction slower than the baseline that counts as a regression",
+    )
+    parser.add_argument(
+        "--tmp",
+        default="/dev/shm" if path.isdir("/dev/shm") else None,
+        help="directory to create files in, defaults to tmpfs if there is one",
+    )
+    args = parser.parse_args()
+
+    tmp = mkdtemp(prefix="brp-bench-", dir=args.tmp)
+    results = {}
+    try:
+        for size in args.sizes:
+            measures = {
+                "seconds": run_size(size, tmp, args.columnar, False, args.save_limit)
+            }
+            if args.memory:
+                measures["peak"] = run_size(
+                    size, tmp, args.columnar, True, args.save_limit
+                )
+            results[str(size)] = measures
+    finally:
+        rmtree(tmp, ignore_errors=True)
+    _print_table(results)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as fp:
+            json.dump(results, fp, indent=2)
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as fp:
+            baseline = json.load(fp)
+        regressions = compare(results, baseline, args.tolerance)
+        for size, key, name, base, value in regressions:
+            print(f"REGRESSION {size} {name} {key}: {base:.3f} -> {value:.3f}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
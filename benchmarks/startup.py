@@ -0,0 +1,97 @@
+"""Time how long brp takes to start and run an empty batch script
+
+The time of a bare interpreter is measured the same way and taken off, so
+what's left is the cost of importing and setting up brp before the first
+command runs. Like ``benchmarks.run`` it's compared against a stored
+baseline, and fails if it got worse by more than the tolerance, or if it's
+over a fixed limit when one is given.
+
+Run from the root of the repo::
+
+    python -m benchmarks.startup --runs 30 --save-baseline startup.json
+    python -m benchmarks.startup --runs 30 --baseline startup.json
+"""
+import json
+import subprocess
+import sys
+from argparse import ArgumentParser
+from os import environ, path
+from statistics import median
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+# changes smaller than this are noise, however large they are relatively
+NOISE_MS = 5
+
+
+def _time(cmd, runs, cwd, env):
+    """Median seconds to run cmd"""
+    times = []
+    for _ in range(runs):
+        start = perf_counter()
+        subprocess.run(cmd, cwd=cwd, env=env, check=True, capture_output=True)
+        times.append(perf_counter() - start)
+    return median(times)
+
+
+def main():
+    """Time startup and compare it to the limit"""
+    parser = ArgumentParser(
+        prog="python -m benchmarks.startup",
+        description="time how long brp takes to start",
+    )
+    parser.add_argument("--runs", type=int, default=20, help="number of runs to time")
+    parser.add_argument(
+        "--limit",
+        type=float,
+        default=None,
+        help="most milliseconds brp can add on top of the interpreter",
+    )
+    parser.add_argument("--baseline", help="fail if slower than this baseline")
+    parser.add_argument("--save-baseline", help="write results as a new baseline")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="fraction slower than the baseline that counts as a regression",
+    )
+    args = parser.parse_args()
+
+    env = dict(environ)
+    root = path.dirname(path.dirname(path.abspath(__file__)))
+    env["PYTHONPATH"] = root + path.pathsep + env.get("PYTHONPATH", "")
+    with TemporaryDirectory() as tmp:
+        script = path.join(tmp, "empty.brp")
+        open(script, "w").close()
+        open(path.join(tmp, "file.txt"), "w").close()
+        bare = _time([sys.executable, "-c", "pass"], args.runs, tmp, env)
+        brp = _time(
+            [sys.executable, "-m", "batchrenamer", "--batch", script, "file.txt"],
+            args.runs,
+            tmp,
+            env,
+        )
+    overhead = (brp - bare) * 1000
+    print(f"interpreter {bare * 1000:.1f} ms")
+    print(f"brp         {brp * 1000:.1f} ms")
+    print(f"overhead    {overhead:.1f} ms")
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as fp:
+            json.dump({"overhead_ms": overhead}, fp, indent=2)
+    failed = False
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as fp:
+            base = json.load(fp)["overhead_ms"]
+        if overhead > base * (1 + args.tolerance) and overhead - base > NOISE_MS:
+            print(f"REGRESSION overhead: {base:.1f} -> {overhead:.1f} ms")
+            failed = True
+    if args.limit is not None and overhead > args.limit:
+        print(f"OVER LIMIT overhead: {overhead:.1f} > {args.limit:.0f} ms")
+        failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,22 @@
 """BatchRenamer Tests"""
 import unittest
+from collections import Counter
 from io import StringIO
-from os import makedirs
+from itertools import chain
+from os import chdir, getcwd, makedirs, remove
 from os.path import isfile, join
 from shutil import rmtree
 from unittest import mock
 
 from batchrenamer import BatchRenamer
+from batchrenamer.sources import read_file_list, read_names, walk
 
 
 class BatchRenamerTests(unittest.TestCase):
     """Test functionality of BatchRenamer"""
 
+    columnar = False
+
     @staticmethod
     def _make_clean(dirname):
         rmtree(dirname, ignore_errors=True)
@@ -34,7 +39,7 @@ class BatchRenamerTests(unittest.TestCase):
     def setUp(self):
         # self._make_clean(self.res)
         self._touch(self.original1)
-        self.brp = BatchRenamer(self.original1)
+        self.brp = BatchRenamer(self.original1, columnar=self.columnar)
 
     def test_list(self):
         """List files"""
@@ -73,6 +78,18 @@ class BatchRenamerTests(unittest.TestCase):
         self.assertEqual(values[0], self.original1)
         self.assertEqual(values[1], join(self.res, "bar.txt"))
 
+    def test_case_seed(self):
+        """Sponge case with a seed is the same each run"""
+        names = []
+        for _ in range(2):
+            resp_args = self.brp.parser.parse_args(["case", "sponge", "--seed", "3"])
+            with mock.patch("sys.stdout", new_callable=StringIO):
+                resp_args.func(resp_args)
+            names.append(self.brp.files[0].rename.name)
+            self.brp.undo(self.brp.parser.parse_args(["undo"]))
+        self.assertEqual(names[0], names[1])
+        self.assertEqual(names[0].lower(), "file")
+
     def test_undo(self):
         """Undo change to filenames"""
         resp_args = self.brp.parser.parse_args(["re", "file", "bar"])
@@ -87,6 +104,220 @@ class BatchRenamerTests(unittest.TestCase):
         values = mock_stdout.getvalue().splitlines()
         self.assertEqual(values[1], self.original1)
 
+    def test_preview(self):
+        """Previewing patterns only logs the one that's applied"""
+        resp_args = self.brp.parser.parse_args(["pv", "file", "bar"])
+        answers = ["n", "ile", "ILE", "y"]
+        with mock.patch("sys.stdout", new_callable=StringIO) as mock_stdout, mock.patch(
+            "builtins.input", side_effect=answers
+        ):
+            resp_args.func(resp_args)
+        values = mock_stdout.getvalue().splitlines()
+        self.assertEqual(values[0].split(), ["file.txt", "->", "bar.txt"])
+        self.assertEqual(values[1], "1 files would change.")
+        self.assertEqual(values[2].split(), ["file.txt", "->", "fILE.txt"])
+        self.assertEqual(len(self.brp.log), 1)
+        self.assertEqual(self.brp.files[0].rename.name, "fILE")
+
+    def test_undo_many(self):
+        """Undoing several changes restores each changed file once"""
+        names = [join(self.res, name) for name in ("a1.txt", "b1.txt", "b2.txt")]
+        self.brp = BatchRenamer(*names, columnar=self.columnar)
+        for cmd in (["re", "b", "c"], ["re", "c", "d"], ["re", "1", "9"]):
+            resp_args = self.brp.parser.parse_args(cmd)
+            with mock.patch("sys.stdout", new_callable=StringIO):
+                resp_args.func(resp_args)
+        past = [info.name for info in self.brp.log.past(1)]
+        self.assertEqual(past, ["b1", "c1", "d1"])
+        resp_args = self.brp.parser.parse_args(["undo", "2"])
+        with mock.patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+            resp_args.func(resp_args)
+        self.assertIn("3 changed, 0 unchanged", mock_stdout.getvalue())
+        self.assertEqual(self.brp.files[1].rename.name, "c1")
+        self.assertEqual([info.name for info in self.brp.log.past(1)], ["b1"])
+        resp_args = self.brp.parser.parse_args(["undo", "5"])
+        with mock.patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+            resp_args.func(resp_args)
+        self.assertEqual(mock_stdout.getvalue(), "All changes have been undone.\n")
+        self.assertEqual(self.brp.log.past(1), [])
+        self.assertEqual([f.rename.fullname for f in self.brp.files], names)
+
+    def test_print_changed(self):
+        """Only files the last command changed are printed"""
+        names = [join(self.res, name) for name in ("a1.txt", "b1.txt", "b2.txt")]
+        self.brp = BatchRenamer(*names, columnar=self.columnar)
+        resp_args = self.brp.parser.parse_args(["re", "b", "a"])
+        with mock.patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+            resp_args.func(resp_args)
+        values = mock_stdout.getvalue().splitlines()
+        self.assertEqual(values[0], names[1])
+        self.assertEqual(values[3], names[2])
+        self.assertEqual(values[-1], "2 changed, 1 unchanged, 1 collisions")
+        resp_args = self.brp.parser.parse_args(["list", "-n", "1"])
+        with mock.patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+            resp_args.func(resp_args)
+        values = mock_stdout.getvalue().splitlines()
+        self.assertEqual(values[3], "... and 2 more")
+        self.assertEqual(values[-1], "3 files, 2 collisions")
+
+    def test_undo_collisions(self):
+        """Collisions are counted from the names files are put back to"""
+        names = [join(self.res, name) for name in ("a1.txt", "b1.txt", "b2.txt")]
+        self.brp = BatchRenamer(*names, columnar=self.columnar)
+        for cmd in (["re", "b", "a"], ["undo"], ["list"]):
+            resp_args = self.brp.parser.parse_args(cmd)
+            with mock.patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+                resp_args.func(resp_args)
+        self.assertEqual(mock_stdout.getvalue().splitlines()[-1], "3 files, 0 collisions")
+
+    def test_fused_collisions(self):
+        """Collisions are counted from names before a pass, not between its steps"""
+        names = [join(self.res, name) for name in ("a.txt", "b.txt", "c.txt")]
+        self.brp = BatchRenamer(*names, columnar=self.columnar)
+        script = join(self.res, "script.brp")
+        with open(script, "w") as fp:
+            fp.write("re a x\nre x y\n")
+        patterns = join(self.res, "patterns.txt")
+        with open(patterns, "w") as fp:
+            fp.write("y 1\ny 2\n")
+        resp_args = self.brp.parser.parse_args(["list"])
+        with mock.patch("sys.stdout", new_callable=StringIO):
+            resp_args.func(resp_args)
+        for first in (["auto", script], ["ap", "-f", patterns]):
+            for cmd in (first, ["list"]):
+                resp_args = self.brp.parser.parse_args(cmd)
+                with mock.patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+                    resp_args.func(resp_args)
+            self.assertEqual(mock_stdout.getvalue().splitlines()[-1], "3 files, 0 collisions")
+            self.assertEqual(
+                self.brp._targets.counts,
+                Counter(f.rename.fullname for f in self.brp.files),
+            )
+
+    def test_select(self):
+        """Commands only change files in the active selection"""
+        sub = join(self.res, "sub")
+        names = [join(self.res, "a1.txt"), join(self.res, "b1.jpg")]
+        names.append(join(sub, "c1.JPG"))
+        self.brp = BatchRenamer(*names, columnar=self.columnar)
+        for cmd in (["sel", "pics", "-e", "jpg"], ["re", "1", "2"]):
+            resp_args = self.brp.parser.parse_args(cmd)
+            with mock.patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+                resp_args.func(resp_args)
+        values = mock_stdout.getvalue().splitlines()
+        self.assertEqual(values[-1], "2 changed, 1 unchanged, 0 collisions")
+        self.assertEqual([f.rename.name for f in self.brp.files], ["a1", "b2", "c2"])
+        for cmd in (
+            ["fl", "-d", sub],
+            ["ext", "png", ""],
+            ["sel", "all"],
+            ["sel", "-g", "*.png"],
+        ):
+            resp_args = self.brp.parser.parse_args(cmd)
+            with mock.patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+                resp_args.func(resp_args)
+        self.assertEqual(mock_stdout.getvalue(), "1 files selected as selection.\n")
+        self.assertEqual(self.brp.files[2].rename.fullname, join(sub, "c2.png"))
+        self.assertEqual(self.brp.selections.named["pics"], [2])
+        resp_args = self.brp.parser.parse_args(["sel"])
+        with mock.patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+            resp_args.func(resp_args)
+        values = mock_stdout.getvalue().splitlines()
+        self.assertEqual(values[0], "  all: 3 files")
+        self.assertEqual(values[1:], ["  pics: 1 files", "* selection: 1 files"])
+
+    def test_undo_select(self):
+        """Selecting by extension after an undo uses the restored extensions"""
+        names = [join(self.res, name) for name in ("a1.txt", "b2.jpg", "c1.txt")]
+        self.brp = BatchRenamer(*names, columnar=self.columnar)
+        for cmd in (["sel", "-e", "jpg"], ["sel", "all"], ["ext", "md", "1"], ["undo"]):
+            resp_args = self.brp.parser.parse_args(cmd)
+            with mock.patch("sys.stdout", new_callable=StringIO):
+                resp_args.func(resp_args)
+        for ext, found in (("md", []), ("txt", [0, 2])):
+            for cmd in (["sel", "all"], ["sel", "-e", ext]):
+                resp_args = self.brp.parser.parse_args(cmd)
+                with mock.patch("sys.stdout", new_callable=StringIO):
+                    resp_args.func(resp_args)
+            self.assertEqual(sorted(self.brp.selections.indices), found)
+
+    def test_fused_select(self):
+        """Files changed twice in one pass keep the extension index in step"""
+        names = [join(self.res, name) for name in ("a1.txt", "b2.jpg", "c1.txt")]
+        self.brp = BatchRenamer(*names, columnar=self.columnar)
+        script = join(self.res, "script.brp")
+        with open(script, "w") as fp:
+            fp.write("ext foo .\next bar .\n")
+        for cmd in (["sel", "-e", "txt"], ["sel", "all"]):
+            resp_args = self.brp.parser.parse_args(cmd)
+            with mock.patch("sys.stdout", new_callable=StringIO):
+                resp_args.func(resp_args)
+        with mock.patch("sys.stdout", new_callable=StringIO):
+            self.brp.automate(script)
+        self.assertEqual(len(self.brp.log), 2)
+        for ext, found in (("bar", [0, 1, 2]), ("foo", []), ("txt", [])):
+            for cmd in (["sel", "all"], ["sel", "-e", ext]):
+                resp_args = self.brp.parser.parse_args(cmd)
+                with mock.patch("sys.stdout", new_callable=StringIO):
+                    resp_args.func(resp_args)
+            self.assertEqual(sorted(self.brp.selections.indices), found)
+
+    def test_history(self):
+        """History only lists changes made to the file"""
+        for cmd in (["re", "file", "bar"], ["re", "nomatch", "x"], ["ext", "csv", "bar"]):
+            resp_args = self.brp.parser.parse_args(cmd)
+            with mock.patch("sys.stdout", new_callable=StringIO):
+                resp_args.func(resp_args)
+        self.assertEqual(len(self.brp.log), 3)
+        self.assertEqual(len(self.brp.log.operations[1].changes), 0)
+        resp_args = self.brp.parser.parse_args(["hist"])
+        with mock.patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+            resp_args.func(resp_args)
+        values = mock_stdout.getvalue().splitlines()
+        self.assertEqual(values[1], join(self.res, "bar.csv"))
+        self.assertEqual(values[2].split(), ["2", "file.txt"])
+        self.assertEqual(values[3].split(), ["1", "bar.txt"])
+
+    def test_session(self):
+        """Save session and load it back with its history"""
+        snapshot = join(self.res, "session.json")
+        for cmd in (["re", "file", "bar"], ["case", "upper"], ["ss", snapshot]):
+            resp_args = self.brp.parser.parse_args(cmd)
+            with mock.patch("sys.stdout", new_callable=StringIO):
+                resp_args.func(resp_args)
+        self.brp = BatchRenamer(session=snapshot, columnar=self.columnar)
+        self.assertEqual(self.brp.files[0].rename.name, "BAR")
+        self.assertEqual(len(self.brp.log), 2)
+        resp_args = self.brp.parser.parse_args(["undo"])
+        with mock.patch("sys.stdout", new_callable=StringIO):
+            resp_args.func(resp_args)
+        self.assertEqual(self.brp.files[0].rename.name, "bar")
+        self.assertEqual(self.brp.files[0].original, self.brp.files[0].current)
+
+    def test_stats(self):
+        """Commands run by automate are timed"""
+        auto = join(self.res, "stats.brp")
+        with open(auto, "w") as fp:
+            fp.write("re file bar\nundo\n")
+        self.brp.automate(auto)
+        resp_args = self.brp.parser.parse_args(["stats"])
+        with mock.patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+            resp_args.func(resp_args)
+        values = [line.split() for line in mock_stdout.getvalue().splitlines()]
+        self.assertEqual(values[1][0], "replace")
+        self.assertEqual(values[1][2:4], ["1", "1"])
+        self.assertEqual(values[2][0], "undo")
+        self.assertEqual(values[2][2:4], ["1", "1"])
+
+    def test_reset(self):
+        """Reset back to original names"""
+        for cmd in (["re", "file", "bar"], ["case", "upper"], ["reset", "-c"]):
+            resp_args = self.brp.parser.parse_args(cmd)
+            with mock.patch("sys.stdout", new_callable=StringIO):
+                resp_args.func(resp_args)
+        self.assertEqual(self.brp.files[0].rename, self.brp.files[0].original)
+        self.assertEqual(len(self.brp.log), 0)
+
     def test_save(self):
         """Save changes to filenames"""
         resp_args = self.brp.parser.parse_args(["re", "file", "bar"])
@@ -97,6 +328,118 @@ class BatchRenamerTests(unittest.TestCase):
             resp_args.func(resp_args)
         self.assertTrue(isfile(join(self.res, "bar.txt")))
 
+    def test_save_workers(self):
+        """Save with threads and collect files that fail"""
+        names = [join(self.res, f"work{num}.txt") for num in range(3)]
+        for name in names:
+            self._touch(name)
+        self.brp = BatchRenamer(*names, columnar=self.columnar, workers=2)
+        resp_args = self.brp.parser.parse_args(["re", "work", "done"])
+        with mock.patch("sys.stdout", new_callable=StringIO):
+            resp_args.func(resp_args)
+        remove(names[1])
+        resp_args = self.brp.parser.parse_args(["save", "-c"])
+        with mock.patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+            resp_args.func(resp_args)
+        self.assertIn("1 files not renamed.", mock_stdout.getvalue())
+        self.assertTrue(isfile(join(self.res, "done0.txt")))
+        self.assertTrue(isfile(join(self.res, "done2.txt")))
+        self.assertEqual(len(list(self.brp.files.pending())), 1)
+
+    def test_stream(self):
+        """Load filenames lazily from a null separated list and a directory walk"""
+        walked = join(self.res, "walk")
+        self._make_clean(walked)
+        self._touch(join(walked, "song.mp3"))
+        self._touch(join(walked, "cover.jpg"))
+        listed = StringIO(f"{self.original1}\0")
+        self.brp = BatchRenamer(
+            stream=chain(read_names(listed, null=True), walk(walked, ["*.mp3"])),
+            columnar=self.columnar,
+        )
+        self.assertEqual(
+            [file_.original.fullname for file_ in self.brp.files],
+            [self.original1, join(walked, "song.mp3")],
+        )
+
+    def test_stream_missing(self):
+        """Lists and directories that can't be read are skipped on stderr"""
+        missing = join(self.res, "missing")
+        listed = StringIO(f"{self.original1}\n")
+        with mock.patch("sys.stdout", new_callable=StringIO) as mock_stdout, mock.patch(
+            "sys.stderr", new_callable=StringIO
+        ) as mock_stderr:
+            self.brp = BatchRenamer(
+                stream=chain(read_file_list(missing), read_names(listed), walk(missing)),
+                columnar=self.columnar,
+            )
+        self.assertEqual(mock_stdout.getvalue(), "")
+        self.assertEqual(
+            mock_stderr.getvalue().splitlines(),
+            [
+                f"Unable to open {missing}: No such file or directory; skipping",
+                f"Unable to scan {missing}; skipping",
+            ],
+        )
+        self.assertEqual([f.original.fullname for f in self.brp.files], [self.original1])
+
+    def test_batch(self):
+        """Run script without prompts and save"""
+        script = join(self.res, "script.brp")
+        with open(script, "w+") as fp:
+            fp.write("re file bar\next csv\n")
+        with mock.patch("sys.stderr", new_callable=StringIO):
+            summary = self.brp.batch(script)
+        self.assertEqual(summary["commands"], 2)
+        self.assertEqual(summary["renamed"], 1)
+        self.assertIsNone(summary["error"])
+        self.assertTrue(isfile(join(self.res, "bar.csv")))
+
+    def test_batch_missing_value(self):
+        """Command missing a value stops the script without saving"""
+        script = join(self.res, "script.brp")
+        with open(script, "w+") as fp:
+            fp.write("re file bar\nre foo\n")
+        with mock.patch("sys.stderr", new_callable=StringIO):
+            summary = self.brp.batch(script)
+        self.assertIn("missing value", summary["error"])
+        self.assertEqual(summary["renamed"], 0)
+        self.assertTrue(isfile(self.original1))
+
+    def test_batch_errors(self):
+        """Invalid patterns and unreadable files stop the script at their line"""
+        script = join(self.res, "script.brp")
+        for lines, error in (
+            ("re file bar\ncase upper\nre ( x\n", "3: invalid pattern: missing )"),
+            ("re file bar\ncase upper\nsel -m (\n", "3: missing ), unterminated"),
+            (f"re file bar\ncase upper\nlist\nmap {self.res}\n", "4: [Errno"),
+        ):
+            with open(script, "w") as fp:
+                fp.write(lines)
+            with mock.patch("sys.stderr", new_callable=StringIO):
+                summary = self.brp.batch(script)
+            self.assertTrue(summary["error"].startswith(f"{script}:{error}"))
+            self.assertEqual(summary["renamed"], 0)
+            self.assertTrue(isfile(self.original1))
+
+    def test_automate_fused(self):
+        """Name changes in a script share a pass but undo one line at a time"""
+        script = join(self.res, "script.brp")
+        with open(script, "w+") as fp:
+            fp.write("re file bar\ncase upper\nap BAR baz -p _\nlist\next csv BAR\n")
+        with open(script) as fp:
+            commands = self.brp.compile_script(fp, script)
+        stages = self.brp.compile_pipeline(commands)
+        self.assertEqual([len(s) if isinstance(s, list) else 1 for s in stages], [3, 1, 1])
+        with mock.patch("sys.stdout", new_callable=StringIO):
+            self.brp.automate(script)
+        self.assertEqual(self.brp.files[0].rename.fullname, join(self.res, "BAR_baz.csv"))
+        self.assertEqual(len(self.brp.log), 4)
+        resp_args = self.brp.parser.parse_args(["undo", "2"])
+        with mock.patch("sys.stdout", new_callable=StringIO):
+            resp_args.func(resp_args)
+        self.assertEqual(self.brp.files[0].rename.fullname, join(self.res, "BAR.txt"))
+
     def test_quit(self):
         """Quit the program"""
         resp_args = self.brp.parser.parse_args(["quit", "-c"])
@@ -131,7 +474,7 @@ class BatchRenamerTests(unittest.TestCase):
         self._touch(ep2)
         with open(ep_list, "w+") as fp:
             fp.write("0101 Foo\ns01e02 Bar")
-        self.brp = BatchRenamer(ep1, ep2)
+        self.brp = BatchRenamer(ep1, ep2, columnar=self.columnar)
         resp_args = self.brp.parser.parse_args(["ap", "-f", ep_list])
         with mock.patch("sys.stdout", new_callable=StringIO) as mock_stdout:
             resp_args.func(resp_args)
@@ -141,6 +484,88 @@ class BatchRenamerTests(unittest.TestCase):
         self.assertEqual(values[3], ep2)
         self.assertEqual(values[4], ep2_title)
 
+    def test_append_file_and_value(self):
+        """Append from a file and a value given on the command line together"""
+        ep_list = join(self.res, "eps.tsv")
+        ep1 = join(self.res, "Show - 0101.txt")
+        ep2 = join(self.res, "Show - 0102.txt")
+        self._touch(ep1)
+        self._touch(ep2)
+        with open(ep_list, "w+") as fp:
+            fp.write("0101 Foo")
+        self.brp = BatchRenamer(ep1, ep2, columnar=self.columnar)
+        resp_args = self.brp.parser.parse_args(["ap", "0102", "Bar", "-f", ep_list])
+        with mock.patch("sys.stdout", new_callable=StringIO):
+            resp_args.func(resp_args)
+        self.assertEqual(
+            [f.rename.fullname for f in self.brp.files],
+            [join(self.res, "Show - 0101 Foo.txt"), join(self.res, "Show - 0102 Bar.txt")],
+        )
+
+    def test_map(self):
+        """Rename files from a table of old and new names"""
+        table = join(self.res, "names.csv")
+        tr1 = join(self.res, "Foo.txt")
+        tr2 = join(self.res, "Bar.txt")
+        self._touch(tr1)
+        self._touch(tr2)
+        with open(table, "w+") as fp:
+            fp.write("old,new\nFoo,01 Foo\nBaz,nope\n")
+        self.brp = BatchRenamer(tr1, tr2, columnar=self.columnar)
+        resp_args = self.brp.parser.parse_args(["map", table, "-k", "stem", "--header"])
+        with mock.patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+            resp_args.func(resp_args)
+        values = mock_stdout.getvalue().splitlines()
+        self.assertEqual(values[1], join(self.res, "01 Foo.txt"))
+        self.assertIn("1 rows didn't match a file:", values)
+        self.assertIn("1 files weren't in the table:", values)
+        self.assertEqual(values[-1], f"   {tr2}")
+
+    def test_map_path(self):
+        """Paths in the table match files however they were given"""
+        self._touch(join(self.res, "a.txt"))
+        self._touch(join(self.res, "b.txt"))
+        with open(join(self.res, "names.csv"), "w") as fp:
+            fp.write("a.txt,z.txt\nb.txt,sub/y.txt\n")
+        cwd = getcwd()
+        chdir(self.res)
+        try:
+            self.brp = BatchRenamer("a.txt", "b.txt", columnar=self.columnar)
+            resp_args = self.brp.parser.parse_args(["map", "names.csv", "-k", "path"])
+            with mock.patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+                resp_args.func(resp_args)
+        finally:
+            chdir(cwd)
+        values = mock_stdout.getvalue().splitlines()
+        self.assertEqual(self.brp.files[0].rename.name, "z")
+        self.assertIn("1 rows had a new name that isn't a filename:", values)
+        self.assertIn("   b.txt -> sub/y.txt", values)
+        self.assertNotIn("rows didn't match a file:", mock_stdout.getvalue())
+
+    def test_number(self):
+        """Number files sorted by size"""
+        big = join(self.res, "big.txt")
+        small = join(self.res, "small.txt")
+        with open(big, "w") as fp:
+            fp.write("big file")
+        self._touch(small)
+        self.brp = BatchRenamer(big, small, columnar=self.columnar)
+        resp_args = self.brp.parser.parse_args(["num", "{name}_{n:02d}", "-k", "size"])
+        with mock.patch("sys.stdout", new_callable=StringIO):
+            resp_args.func(resp_args)
+        self.assertEqual(self.brp.files[0].rename.name, "big_02")
+        self.assertEqual(self.brp.files[1].rename.name, "small_01")
+
+    def test_hash(self):
+        """Rename files to their digest"""
+        cache = join(self.res, "hashes.jsonl")
+        cmd = ["hash", "-a", "md5", "-l", "8", "--cache", cache]
+        resp_args = self.brp.parser.parse_args(cmd)
+        with mock.patch("sys.stdout", new_callable=StringIO):
+            resp_args.func(resp_args)
+        self.assertEqual(self.brp.files[0].rename.name, "d41d8cd9")
+        self.assertEqual(self.brp.files[0].rename.ext, ".txt")
+
     def test_prepend(self):
         """Prepend numbers to files"""
         tr_list = join(self.res, "trs.tsv")
@@ -152,7 +577,7 @@ class BatchRenamerTests(unittest.TestCase):
         self._touch(tr2)
         with open(tr_list, "w+") as fp:
             fp.write("Foo 01\nBar 02")
-        self.brp = BatchRenamer(tr1, tr2)
+        self.brp = BatchRenamer(tr1, tr2, columnar=self.columnar)
         resp_args = self.brp.parser.parse_args(["pre", "-f", tr_list])
         with mock.patch("sys.stdout", new_callable=StringIO) as mock_stdout:
             resp_args.func(resp_args)
@@ -161,3 +586,9 @@ class BatchRenamerTests(unittest.TestCase):
         self.assertEqual(values[1], tr1_title)
         self.assertEqual(values[3], tr2)
         self.assertEqual(values[4], tr2_title)
+
+
+class ColumnarBatchRenamerTests(BatchRenamerTests):
+    """Test functionality of BatchRenamer using the columnar backend"""
+
+    columnar = True
@@ -0,0 +1,53 @@
+"""Hashing Tests"""
+import hashlib
+import unittest
+from os import makedirs
+from os.path import join
+from shutil import rmtree
+
+from batchrenamer.hashing import HashCache, hash_file, hash_files
+
+
+class HashingTests(unittest.TestCase):
+    """Test functionality of hashing"""
+
+    def setUp(self):
+        self.res = "test/res_hashing"
+        makedirs(self.res, exist_ok=True)
+        self.files = []
+        for num in range(3):
+            filename = join(self.res, f"{num}.txt")
+            with open(filename, "w") as fp:
+                fp.write(f"file {num}\n" * 1000)
+            self.files.append(filename)
+
+    def tearDown(self):
+        rmtree(self.res, ignore_errors=True)
+
+    def test_hash_file(self):
+        """Digest matches hashing the whole file at once"""
+        with open(self.files[0], "rb") as fp:
+            expected = hashlib.blake2b(fp.read()).hexdigest()
+        self.assertEqual(hash_file(self.files[0], "blake2b", size=100), expected)
+        self.assertIsNone(hash_file(join(self.res, "missing.txt")))
+
+    def test_workers(self):
+        """Process pool gives the same digests"""
+        self.assertEqual(hash_files(self.files), hash_files(self.files, workers=2))
+
+    def test_cache(self):
+        """Unchanged files are read from the cache on the next run"""
+        cache_file = join(self.res, "cache", "hashes.jsonl")
+        first = hash_files(self.files, cache=HashCache(cache_file))
+        cache = HashCache(cache_file)
+        self.assertEqual(len(cache.digests), 3)
+        # a cached digest is used instead of reading the file
+        key = next(iter(cache.digests))
+        cache.digests[key] = "cached"
+        again = hash_files(self.files, cache=cache)
+        self.assertIn("cached", again.values())
+        with open(self.files[1], "a") as fp:
+            fp.write("changed")
+        changed = hash_files(self.files, cache=HashCache(cache_file))
+        self.assertNotEqual(changed[self.files[1]], first[self.files[1]])
+        self.assertEqual(changed[self.files[0]], first[self.files[0]])
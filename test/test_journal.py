@@ -0,0 +1,57 @@
+"""Rename journal Tests"""
+import unittest
+from io import StringIO
+from os import makedirs, rename
+from os.path import isfile, join
+from shutil import rmtree
+from unittest import mock
+
+from batchrenamer import BatchRenamer
+from batchrenamer.journal import Journal, read_journal, resume_journal, rollback_journal
+from batchrenamer.planner import RenameStep
+
+
+class JournalTests(unittest.TestCase):
+    """Test functionality of the rename journal"""
+
+    def setUp(self):
+        self.res = "test/res_journal"
+        rmtree(self.res, ignore_errors=True)
+        makedirs(self.res)
+        self.journal = join(self.res, "brp.journal")
+        self.names = [join(self.res, f"file{num}.txt") for num in range(3)]
+        for name in self.names:
+            open(name, "a").close()
+
+    def tearDown(self):
+        rmtree(self.res, ignore_errors=True)
+
+    def test_resume(self):
+        """Renames started but never finished are completed"""
+        steps = [RenameStep(idx, name, name + ".new", False) for idx, name in enumerate(self.names)]
+        with Journal(self.journal) as journal:
+            ids = journal.begin(steps)
+            rename(steps[0].old, steps[0].new)
+            journal.finish(done=ids[:1])
+            # killed after renaming but before marking it done
+            rename(steps[1].old, steps[1].new)
+        report = resume_journal(self.journal)
+        self.assertEqual(sorted(report.renamed), [1, 2])
+        self.assertEqual(report.failed, [])
+        for step in steps:
+            self.assertTrue(isfile(step.new))
+        states = {entry.state for entry in read_journal(self.journal).values()}
+        self.assertEqual(states, {"D"})
+
+    def test_rollback(self):
+        """Saved renames are moved back to their old names"""
+        brp = BatchRenamer(*self.names, journal=self.journal)
+        with mock.patch("sys.stdout", new_callable=StringIO):
+            for cmd in (["re", "file", "done"], ["save", "-c"]):
+                resp_args = brp.parser.parse_args(cmd)
+                resp_args.func(resp_args)
+        self.assertTrue(isfile(join(self.res, "done0.txt")))
+        report = rollback_journal(self.journal)
+        self.assertEqual(len(report.renamed), 3)
+        for name in self.names:
+            self.assertTrue(isfile(name))
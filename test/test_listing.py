@@ -0,0 +1,66 @@
+"""Listing Tests"""
+import unittest
+from io import StringIO
+from os import makedirs, scandir, utime
+from os.path import join
+from shutil import rmtree
+from unittest import mock
+
+from batchrenamer import BatchRenamer
+from batchrenamer.listing import DirectoryListings, check_files
+
+
+class ListingTests(unittest.TestCase):
+    """Test functionality of listing"""
+
+    def setUp(self):
+        self.res = "test/res_listing"
+        self.sub = join(self.res, "sub")
+        makedirs(self.sub, exist_ok=True)
+        self.files = [join(self.res, "a.txt"), join(self.sub, "b.txt")]
+        for filename in self.files:
+            open(filename, "w").close()
+
+    def tearDown(self):
+        rmtree(self.res, ignore_errors=True)
+
+    def test_check_files(self):
+        """Missing files and directories are reported, each directory listed once"""
+        listings = DirectoryListings(workers=2)
+        missing = join(self.res, "missing.txt")
+        gone = join(self.res, "gone", "c.txt")
+        with mock.patch("batchrenamer.listing.scandir", wraps=scandir) as scan:
+            problems = check_files([*self.files, missing, self.sub, gone], listings)
+        # gone can't be listed, so only res and sub are read
+        self.assertEqual(scan.call_count, 2)
+        self.assertEqual(
+            [tuple(problem) for problem in problems],
+            [
+                (missing, "no such file"),
+                (self.sub, "is a directory"),
+                (gone, "directory can't be read"),
+            ],
+        )
+
+    def test_exists(self):
+        """Listings are used until their directory changes"""
+        listings = DirectoryListings()
+        new = join(self.res, "new.txt")
+        self.assertTrue(listings.exists(self.files[0]))
+        self.assertFalse(listings.exists(new))
+        open(new, "w").close()
+        # make sure the change shows up even on coarse timestamps
+        utime(self.res, ns=(0, 0))
+        listings.refresh()
+        self.assertTrue(listings.exists(new))
+
+    def test_validate(self):
+        """Files that don't exist are left out when loading"""
+        missing = join(self.res, "missing.txt")
+        with mock.patch("sys.stdout", new_callable=StringIO) as mock_stdout, mock.patch(
+            "sys.stderr", new_callable=StringIO
+        ) as mock_stderr:
+            brp = BatchRenamer(*self.files, missing, validate=True)
+        self.assertEqual(mock_stdout.getvalue(), "")
+        self.assertEqual(mock_stderr.getvalue(), f"Skipping {missing}: no such file\n")
+        self.assertEqual([f.current.fullname for f in brp.files], self.files)
@@ -0,0 +1,33 @@
+"""PatternIndex Tests"""
+import re
+import unittest
+
+from batchrenamer.matcher import PatternIndex
+
+
+class PatternIndexTests(unittest.TestCase):
+    """Test functionality of PatternIndex"""
+
+    def test_matches_search(self):
+        """Same patterns match as searching for each one"""
+        patterns = [
+            "0101",
+            "s01e02",
+            "Show",
+            r"s\d+e03",
+            "^Video",
+            "mp3$",
+            r"(\w)\1",
+            "(?i)pilot",
+            "",
+        ]
+        names = ["Show - 0101", "Video - s01e03", "Show - s01e02 mp3", "Pilot", "ok"]
+        index = PatternIndex(patterns, chunksize=2)
+        for name in names:
+            expected = [idx for idx, pat in enumerate(patterns) if re.search(pat, name)]
+            self.assertEqual(index.matches(name), expected, name)
+
+    def test_duplicate_literals(self):
+        """Every line with the same pattern matches"""
+        index = PatternIndex(["foo", "bar", "foo"])
+        self.assertEqual(index.matches("a foo"), [0, 2])
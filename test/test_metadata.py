@@ -0,0 +1,82 @@
+"""Metadata Tests"""
+import unittest
+from os import makedirs, remove
+from os.path import join
+from shutil import rmtree
+from struct import pack
+
+from batchrenamer.metadata import Metadata, read_exif, template_fields
+
+
+def _jpeg(make, taken):
+    """Smallest jpeg header with a make in ifd0 and a date in the exif ifd"""
+    make = make.encode() + b"\0"
+    taken = taken.encode() + b"\0"
+    # header, ifd0 with 2 entries, exif ifd with 1 entry, then the strings
+    ifd0 = 8
+    exif_ifd = ifd0 + 2 + 2 * 12 + 4
+    make_at = exif_ifd + 2 + 12 + 4
+    taken_at = make_at + len(make)
+    tiff = b"II*\0" + pack("<I", ifd0)
+    tiff += pack("<H", 2)
+    tiff += pack("<HHII", 0x010F, 2, len(make), make_at)
+    tiff += pack("<HHII", 0x8769, 4, 1, exif_ifd)
+    tiff += pack("<I", 0)
+    tiff += pack("<H", 1)
+    tiff += pack("<HHII", 0x9003, 2, len(taken), taken_at)
+    tiff += pack("<I", 0)
+    tiff += make + taken
+    app1 = b"Exif\0\0" + tiff
+    return b"\xff\xd8\xff\xe1" + pack(">H", len(app1) + 2) + app1 + b"\xff\xda"
+
+
+class MetadataTests(unittest.TestCase):
+    """Test functionality of metadata"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.res = "test/res_metadata"
+        makedirs(cls.res, exist_ok=True)
+        cls.photo = join(cls.res, "photo.jpg")
+        with open(cls.photo, "wb") as fp:
+            fp.write(_jpeg("Camera", "2021:05:01 12:30:00"))
+
+    @classmethod
+    def tearDownClass(cls):
+        rmtree(cls.res, ignore_errors=True)
+
+    def test_read_exif(self):
+        """Tags are read from ifd0 and the exif ifd"""
+        tags = read_exif(self.photo)
+        self.assertEqual(tags.Make, "Camera")
+        self.assertEqual(tags.DateTimeOriginal, "2021:05:01 12:30:00")
+        self.assertEqual(tags.Model, "")
+
+    def test_not_exif(self):
+        """Files without exif have no tags"""
+        other = join(self.res, "notes.txt")
+        with open(other, "w") as fp:
+            fp.write("no exif here")
+        self.assertEqual(read_exif(other), {})
+        self.assertEqual(read_exif(join(self.res, "missing.jpg")), {})
+
+    def test_cached(self):
+        """Files are only read the first time"""
+        copy = join(self.res, "copy.jpg")
+        with open(copy, "wb") as fp:
+            fp.write(_jpeg("Other", "2020:01:01 00:00:00"))
+        metadata = Metadata(workers=2)
+        values = metadata.fields([self.photo, copy], {"size", "exif"})
+        self.assertEqual(values[copy]["exif"].Make, "Other")
+        remove(copy)
+        again = metadata.fields([copy], {"size", "exif"})
+        self.assertEqual(again[copy]["size"], values[copy]["size"])
+        metadata.clear()
+        self.assertIsNone(metadata.fields([copy], {"size"})[copy])
+
+    def test_template_fields(self):
+        """Fields used by a template are found and checked"""
+        fields = template_fields("{mtime:%Y}_{exif.Make}_{n:03d}")
+        self.assertEqual(fields, {"mtime", "exif", "n"})
+        with self.assertRaises(ValueError):
+            template_fields("{nope}")
@@ -0,0 +1,36 @@
+"""PatternCache Tests"""
+import re
+import unittest
+
+from batchrenamer.patterns import PatternCache
+
+
+class PatternCacheTests(unittest.TestCase):
+    """Test functionality of PatternCache"""
+
+    def test_hits_and_misses(self):
+        """Patterns compile once and are reused after"""
+        cache = PatternCache()
+        first = cache.compile("foo")
+        second = cache.compile("foo")
+        self.assertIs(first, second)
+        self.assertEqual(cache.info().hits, 1)
+        self.assertEqual(cache.info().misses, 1)
+
+    def test_eviction(self):
+        """Least recently used pattern is dropped when full"""
+        cache = PatternCache(maxsize=2)
+        cache.compile("a")
+        cache.compile("b")
+        cache.compile("a")
+        cache.compile("c")
+        self.assertEqual(len(cache), 2)
+        cache.compile("b")
+        self.assertEqual(cache.info().misses, 4)
+
+    def test_compiled_passthru(self):
+        """Already compiled patterns aren't cached"""
+        cache = PatternCache()
+        pattern = re.compile("foo")
+        self.assertIs(cache.compile(pattern), pattern)
+        self.assertEqual(len(cache), 0)
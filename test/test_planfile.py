@@ -0,0 +1,90 @@
+"""Plan File Tests"""
+import unittest
+from os import chdir, getcwd, makedirs
+from os.path import join
+from shutil import rmtree
+
+from batchrenamer.planfile import apply_plan, read_plan, write_plan
+from batchrenamer.planner import plan_renames
+
+
+class PlanFileTests(unittest.TestCase):
+    """Test functionality of plan files"""
+
+    def setUp(self):
+        self.res = "test/res_planfile"
+        makedirs(self.res, exist_ok=True)
+        self.paths = {}
+        for name in ("a", "b", "c"):
+            self.paths[name] = join(self.res, f"{name}.txt")
+            with open(self.paths[name], "w") as fp:
+                fp.write(name)
+
+    def tearDown(self):
+        rmtree(self.res, ignore_errors=True)
+
+    def _plan(self):
+        paths = self.paths
+        return plan_renames(
+            [
+                (0, paths["a"], paths["b"]),
+                (1, paths["b"], paths["a"]),
+                (2, paths["c"], join(self.res, "d\udcff.txt")),
+            ]
+        )
+
+    def test_round_trip(self):
+        """Both formats read back the same chains"""
+        plan = self._plan()
+        for binary in (False, True):
+            filename = join(self.res, "plan")
+            self.assertEqual(write_plan(filename, plan.chains, binary=binary), 4)
+            chains = list(read_plan(filename))
+            # paths come back resolved against the directory of the plan
+            cwd = getcwd()
+            self.assertEqual(
+                [[step[1:] for step in chain] for chain in chains],
+                [
+                    [(join(cwd, step.old), join(cwd, step.new), step.partial) for step in chain]
+                    for chain in plan.chains
+                ],
+            )
+
+    def test_apply(self):
+        """Files are renamed in the order of the plan"""
+        filename = join(self.res, "plan.bin")
+        write_plan(filename, self._plan().chains, binary=True)
+        renamed, failed = apply_plan(filename, chunksize=1)
+        self.assertEqual((renamed, failed), (3, []))
+        with open(self.paths["a"]) as fp:
+            self.assertEqual(fp.read(), "b")
+        with open(join(self.res, "d\udcff.txt")) as fp:
+            self.assertEqual(fp.read(), "c")
+
+    def test_apply_target_taken(self):
+        """Files created since the plan was written aren't overwritten"""
+        filename = join(self.res, "plan")
+        new = join(self.res, "d.txt")
+        write_plan(filename, plan_renames([(0, self.paths["c"], new)]).chains)
+        with open(new, "w") as fp:
+            fp.write("d")
+        renamed, failed = apply_plan(filename)
+        self.assertEqual(renamed, 0)
+        self.assertEqual([(f.index, f.new) for f in failed], [(0, join(getcwd(), new))])
+        self.assertIsInstance(failed[0].error, FileExistsError)
+        with open(new) as fp:
+            self.assertEqual(fp.read(), "d")
+
+    def test_apply_elsewhere(self):
+        """Plans are applied relative to the directory they were written from"""
+        filename = join(getcwd(), self.res, "plan")
+        write_plan(filename, self._plan().chains)
+        cwd = getcwd()
+        chdir(self.res)
+        try:
+            renamed, failed = apply_plan(filename)
+        finally:
+            chdir(cwd)
+        self.assertEqual((renamed, failed), (3, []))
+        with open(self.paths["b"]) as fp:
+            self.assertEqual(fp.read(), "a")
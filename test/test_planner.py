@@ -0,0 +1,105 @@
+"""Rename planner Tests"""
+import unittest
+from os import listdir, makedirs, remove
+from os.path import join
+from shutil import rmtree
+
+from batchrenamer.planner import plan_renames
+from batchrenamer.saver import save_renames
+
+
+class PlannerTests(unittest.TestCase):
+    """Test functionality of plan_renames"""
+
+    def setUp(self):
+        self.res = "test/res_planner"
+        rmtree(self.res, ignore_errors=True)
+        makedirs(self.res)
+
+    def tearDown(self):
+        rmtree(self.res, ignore_errors=True)
+
+    def _write(self, name):
+        with open(join(self.res, name), "w") as fp:
+            fp.write(name)
+
+    def _read(self, name):
+        with open(join(self.res, name)) as fp:
+            return fp.read()
+
+    def _path(self, name):
+        return join(self.res, name)
+
+    def test_swap(self):
+        """Two files swapping names go thru a temporary name"""
+        self._write("a")
+        self._write("b")
+        plan = plan_renames(
+            [(0, self._path("a"), self._path("b")), (1, self._path("b"), self._path("a"))]
+        )
+        self.assertEqual(len(plan.chains), 1)
+        self.assertEqual(len(plan.chains[0]), 3)
+        report = save_renames(plan.chains)
+        self.assertEqual(sorted(report.renamed), [0, 1])
+        self.assertEqual(self._read("a"), "b")
+        self.assertEqual(self._read("b"), "a")
+        self.assertEqual(sorted(listdir(self.res)), ["a", "b"])
+
+    def test_swap_failed(self):
+        """File moved to a temporary name is moved back when its cycle fails"""
+        self._write("a")
+        self._write("b")
+        plan = plan_renames(
+            [(0, self._path("a"), self._path("b")), (1, self._path("b"), self._path("a"))]
+        )
+        remove(self._path("b"))
+        report = save_renames(plan.chains)
+        self.assertEqual(report.renamed, [])
+        self.assertEqual(listdir(self.res), ["a"])
+        self.assertEqual(self._read("a"), "a")
+        failed = {(failure.old, failure.new) for failure in report.failed}
+        self.assertEqual(
+            failed,
+            {
+                (self._path("a"), self._path("b")),
+                (self._path("b"), self._path("a")),
+            },
+        )
+
+    def test_chain(self):
+        """File moving onto a name that is being freed waits for it"""
+        self._write("a")
+        self._write("b")
+        plan = plan_renames(
+            [(0, self._path("a"), self._path("b")), (1, self._path("b"), self._path("c"))]
+        )
+        self.assertEqual([step.index for step in plan.chains[0]], [1, 0])
+        save_renames(plan.chains, workers=2)
+        self.assertEqual(self._read("b"), "a")
+        self.assertEqual(self._read("c"), "b")
+
+    def test_conflicts(self):
+        """Existing and duplicate targets are left out"""
+        self._write("a")
+        self._write("b")
+        self._write("c")
+        self._write("keep")
+        plan = plan_renames(
+            [
+                (0, self._path("a"), self._path("keep")),
+                (1, self._path("b"), self._path("a")),
+                (2, self._path("c"), self._path("d")),
+                (3, self._path("e"), self._path("d")),
+            ]
+        )
+        reasons = {conflict.index: conflict.reason for conflict in plan.conflicts}
+        self.assertEqual(
+            reasons,
+            {
+                0: "target exists",
+                1: "target not freed",
+                2: "duplicate target",
+                3: "duplicate target",
+            },
+        )
+        self.assertEqual(plan.chains, [])